@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Pipelined asyncio loading for high-latency links to Supabase
+A reader thread parses the export, a transformer thread converts the
+records, and several asyncpg writers, each on its own connection, stage
+and merge the rows a batch at a time. The stages are linked by bounded
+queues: while the writers wait on the server the next batches are being
+parsed, and a full queue stalls the stage feeding it, so memory stays
+bounded by the queue depths. Rows are routed to writers by their table
+key, so a key repeated in the export is still merged in file order.
+asyncpg is only needed for this mode and is imported lazily.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+from datetime import date, timedelta
+from itertools import islice
+from db_connection import connect_supabase_async
+from export_reader import export_position
+
+DEFAULT_WRITERS = 4
+
+# Batches a queue holds before the stage feeding it has to wait
+DEFAULT_QUEUE_DEPTH = 4
+
+# Seconds between checks, by a blocked worker thread, for a failed load
+ABORT_POLL = 0.2
+
+# Day zero of PostgreSQL's binary date format
+PG_EPOCH = date(2000, 1, 1)
+
+
+class PipelineAborted(Exception):
+    """Stops the worker threads once another stage of the load has failed"""
+
+
+class Handoff:
+    """Bounded asyncio queue that worker threads put to and get from as well
+
+    The time each side spends blocked is added up, which shows the stage
+    the load is waiting on.
+    """
+
+    def __init__(self, loop, aborted, depth):
+        self.loop = loop
+        self.aborted = aborted
+        self.queue = asyncio.Queue(depth)
+        self.put_waited = 0.0
+        self.get_waited = 0.0
+
+    def _wait(self, coroutine):
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        while True:
+            try:
+                return future.result(ABORT_POLL)
+            except concurrent.futures.TimeoutError:
+                if self.aborted.is_set():
+                    future.cancel()
+                    raise PipelineAborted()
+
+    def put(self, item):
+        """Put from a worker thread, waiting while the queue is full"""
+        started = time.perf_counter()
+        try:
+            self._wait(self.queue.put(item))
+        finally:
+            self.put_waited += time.perf_counter() - started
+
+    def get(self):
+        """Get from a worker thread, waiting while the queue is empty"""
+        started = time.perf_counter()
+        try:
+            return self._wait(self.queue.get())
+        finally:
+            self.get_waited += time.perf_counter() - started
+
+    async def take(self):
+        """Get from a coroutine"""
+        started = time.perf_counter()
+        try:
+            return await self.queue.get()
+        finally:
+            self.get_waited += time.perf_counter() - started
+
+
+class CommitFrontier:
+    """Follows how far into the export every row is merged
+
+    Each batch of records is routed to several writers that commit out of
+    order; a batch is complete once all its rows are merged, and the
+    frontier only moves past a run of complete batches from the start.
+    on_advance(position, last_id) is called whenever it moves.
+    """
+
+    def __init__(self, on_advance=None):
+        self.on_advance = on_advance
+        self.batches = {}
+        self.next = 0
+        self.last_id = None
+
+    def routed(self, seq, parts, position, last_id):
+        """Batch seq was split into parts writer batches"""
+        remaining = self.batches.get(seq, (0,))[0]
+        self.batches[seq] = (remaining + parts, position, last_id)
+        self._advance()
+
+    def written(self, seq):
+        """One writer batch of batch seq was committed"""
+        remaining, position, last_id = self.batches[seq]
+        self.batches[seq] = (remaining - 1, position, last_id)
+        self._advance()
+
+    def _advance(self):
+        position = None
+        while self.batches.get(self.next, (1,))[0] == 0:
+            _, position, last_id = self.batches.pop(self.next)
+            self.last_id = last_id if last_id is not None else self.last_id
+            self.next += 1
+        if position is not None and self.on_advance:
+            self.on_advance(position, self.last_id)
+
+
+class BatchStatements:
+    """A loader's staging and merge statements as text for asyncpg"""
+
+    def __init__(self, loader, connection):
+        statements = loader.copy_statements
+        self.staging = statements.staging.strings[0]
+        self.columns = list(loader.spec.columns)
+        self.begin = f"BEGIN; {statements.create.as_string(connection)}"
+        self.merge = f"{statements.merge.as_string(connection)}; COMMIT"
+        if statements.delete_moved:
+            self.merge = f"{statements.delete_moved.as_string(connection)}; {self.merge}"
+
+
+async def write_batch(connection, statements, rows):
+    """Stage rows with a binary COPY and merge them, in one transaction
+
+    Three round trips: BEGIN with the staging table, the COPY, then the
+    merge with COMMIT. A failed batch is rolled back by closing the
+    connection.
+    """
+    await connection.execute(statements.begin)
+    await connection.copy_records_to_table(statements.staging, records=rows, columns=statements.columns)
+    await connection.execute(statements.merge)
+
+
+async def use_plain_dates(connection):
+    """Send dates as plain day counts
+
+    asyncpg's own codec turns date.min and date.max into -infinity and
+    infinity, so the 0001-01-01 placeholder dates in the exports would not
+    load as they do in the other modes.
+    """
+    await connection.set_type_codec('date', schema='pg_catalog', format='tuple',
+                                    encoder=lambda value: ((value - PG_EPOCH).days,),
+                                    decoder=lambda value: PG_EPOCH + timedelta(days=value[0]))
+
+
+async def open_writers(count, settings=None):
+    """Open count asyncpg connections to Supabase"""
+    results = await asyncio.gather(*(connect_supabase_async(settings) for _ in range(count)),
+                                   return_exceptions=True)
+    writers = [result for result in results if not isinstance(result, BaseException)]
+    if len(writers) < count:
+        await close_writers(writers)
+        raise next(result for result in results if isinstance(result, BaseException))
+    for writer in writers:
+        await use_plain_dates(writer)
+    return writers
+
+
+async def close_writers(writers):
+    """Close the writers, terminating any left inside a transaction"""
+    for writer in writers:
+        if writer.is_closed():
+            continue
+        if writer.is_in_transaction():
+            writer.terminate()
+        else:
+            await writer.close()
+
+
+async def load_pipelined(writers, statements, reader, records, transform, key_positions, stats,
+                         batch_size, depth=DEFAULT_QUEUE_DEPTH, on_advance=None):
+    """Load one table's records through the pipeline; returns the rows merged
+
+    records iterates the export behind reader; transform(records) turns
+    records into row tuples and runs in the transformer thread. Each
+    writer merges batches of about batch_size rows, so batch_size times
+    the number of writers records are read per batch. on_advance is
+    passed to the CommitFrontier. Stage times in stats are busy times,
+    which overlap.
+    """
+    loop = asyncio.get_running_loop()
+    aborted = threading.Event()
+    incoming = Handoff(loop, aborted, depth)
+    queues = [Handoff(loop, aborted, depth) for _ in writers]
+    frontier = CommitFrontier(on_advance)
+    merged = 0
+
+    def read():
+        started = time.perf_counter()
+        try:
+            seq = 0
+            while True:
+                batch = list(islice(records, batch_size * len(writers)))
+                if not batch:
+                    break
+                incoming.put((seq, batch, export_position(reader)))
+                seq += 1
+            incoming.put(None)
+        finally:
+            stats.busy('read', time.perf_counter() - started - incoming.put_waited)
+
+    def route():
+        started = time.perf_counter()
+        parts = [[] for _ in writers]
+        last_id = None
+
+        def records_in_order():
+            while True:
+                item = incoming.get()
+                if item is None:
+                    return
+                seq, batch, position = item
+                yield from batch
+                # Every row of this batch has been routed: send each writer its share
+                filled = [(queue, rows) for queue, rows in zip(queues, parts) if rows]
+                loop.call_soon_threadsafe(frontier.routed, seq, len(filled), position, last_id)
+                for queue, rows in filled:
+                    queue.put((seq, rows))
+                parts[:] = [[] for _ in writers]
+
+        try:
+            for row in transform(records_in_order()):
+                key = tuple(row[position] for position in key_positions)
+                parts[hash(key) % len(parts)].append(row)
+                last_id = key[0]
+            for queue in queues:
+                queue.put(None)
+        finally:
+            waited = incoming.get_waited + sum(queue.put_waited for queue in queues)
+            stats.busy('parse', time.perf_counter() - started - waited)
+
+    async def write(connection, queue):
+        nonlocal merged
+        while True:
+            item = await queue.take()
+            if item is None:
+                return
+            seq, rows = item
+            started = time.perf_counter()
+            await write_batch(connection, statements, rows)
+            stats.busy('write', time.perf_counter() - started)
+            merged += len(rows)
+            stats.add(len(rows))
+            frontier.written(seq)
+
+    workers = [loop.run_in_executor(None, read), loop.run_in_executor(None, route)]
+    tasks = [asyncio.ensure_future(write(writer, queue)) for writer, queue in zip(writers, queues)]
+    try:
+        await asyncio.gather(*workers, *tasks)
+    except BaseException:
+        # A worker thread can be blocked on a lock held by a writer's open
+        # transaction (creating a partition, say), so the writers are
+        # terminated before the threads are waited for
+        aborted.set()
+        for writer in writers:
+            writer.terminate()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*workers, *tasks, return_exceptions=True)
+        raise
+    return merged
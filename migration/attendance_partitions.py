@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Monthly range partitions for the attendance table
+Opt-in layout where attendance is partitioned by date, one partition per
+month, created by the importer as it meets new months. Reloading a month
+truncates its partition instead of upserting every row again.
+"""
+
+from datetime import date
+from psycopg2 import sql
+from table_loader import TableLoader
+from table_specs import TABLE_SPECS
+
+PARTITIONED_TABLE = 'attendance'
+
+# The partition key has to be part of every unique constraint
+PARTITION_KEY = ('id', 'date')
+
+CREATE_PARTITIONED_ATTENDANCE = """
+    CREATE TABLE IF NOT EXISTS attendance (
+        id SERIAL,
+        employee_name VARCHAR(255) NOT NULL,
+        date DATE NOT NULL,
+        shift1_in TIME,
+        shift1_out TIME,
+        shift2_in TIME,
+        shift2_out TIME,
+        PRIMARY KEY (id, date)
+    ) PARTITION BY RANGE (date)
+"""
+
+# Refuses to go on when attendance exists unpartitioned; a server-side check,
+# so it also works from a load script
+REFUSE_PLAIN_ATTENDANCE = """
+    DO $$
+    BEGIN
+        IF to_regclass('attendance') IS NOT NULL AND NOT EXISTS (
+            SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('attendance')
+        ) THEN
+            RAISE EXCEPTION 'attendance already exists as a plain table; drop it first to partition it';
+        END IF;
+    END
+    $$
+"""
+
+# Attendance loader whose upserts target the partitioned primary key
+PARTITIONED_LOADER = TableLoader(TABLE_SPECS[PARTITIONED_TABLE].with_conflict(PARTITION_KEY))
+
+
+def is_partitioned(cursor, table=PARTITIONED_TABLE):
+    """True if table exists and is a partitioned table"""
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))",
+                   (table,))
+    return cursor.fetchone()[0]
+
+
+def next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def partition_name(month):
+    """2025-09-01 -> attendance_2025_09"""
+    return f"{PARTITIONED_TABLE}_{month.year:04d}_{month.month:02d}"
+
+
+class MonthlyPartitions:
+    """Creates the monthly partitions a load needs, each at most once per run"""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.months = set()
+        self.truncated = []
+        self._days = set()
+
+    def ensure(self, month):
+        """Create the partition holding month if it does not exist yet"""
+        if month in self.months:
+            return
+        self.cursor.execute(sql.SQL(
+            "CREATE TABLE IF NOT EXISTS {partition} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)"
+        ).format(partition=sql.Identifier(partition_name(month)),
+                 table=sql.Identifier(PARTITIONED_TABLE)),
+            (month, next_month(month)))
+        self.months.add(month)
+
+    def ensure_for(self, rows, date_position):
+        """Yield rows unchanged, creating the partition of each new month first
+
+        For the batch and rows modes, whose statements run between rows.
+        """
+        for row in rows:
+            self.ensure_day(row[date_position])
+            yield row
+
+    def ensure_day(self, day):
+        """Create the partition holding day (a date or None) if needed"""
+        if day not in self._days:
+            self._days.add(day)
+            if day is not None:
+                self.ensure(day.replace(day=1))
+
+    def staged_months(self, staging):
+        """The months present in a COPY staging table, sorted"""
+        self.cursor.execute(sql.SQL(
+            "SELECT DISTINCT date_trunc('month', date)::date FROM {staging} WHERE date IS NOT NULL"
+        ).format(staging=staging))
+        return sorted(month for month, in self.cursor.fetchall())
+
+    def prepare_months(self, months, replace=False):
+        """Create the partitions of months about to be merged, truncating them if replace
+
+        A month is truncated only the first time it is staged, so a load
+        merged a chunk at a time keeps the rows of its earlier chunks.
+        """
+        for month in months:
+            self.ensure(month)
+        fresh = [month for month in months if month not in self.truncated]
+        if replace and fresh:
+            self.cursor.execute(sql.SQL("TRUNCATE {}").format(
+                sql.SQL(', ').join(sql.Identifier(partition_name(month)) for month in fresh)))
+            self.truncated.extend(fresh)
+
+    def before_merge(self, replace=False):
+        """copy_upsert hook: create the staged months' partitions, truncating them if replace"""
+        def hook(cursor, staging):
+            self.prepare_months(self.staged_months(staging), replace)
+        return hook
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Batched multi-row upserts for Supabase PostgreSQL
+Each batch runs inside a SAVEPOINT; failing batches are bisected so only
+the bad rows are quarantined and the rest of the import keeps going
+"""
+
+import json
+import psycopg2
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+from copy_loader import conflict_action, moved_condition
+
+DEFAULT_BATCH_SIZE = 500
+
+
+class RejectLog:
+    """Append rejected rows with their error to rejected_<table>.jsonl"""
+
+    def __init__(self, table, directory='.', append=False):
+        self.path = f"{directory}/rejected_{table}.jsonl"
+        self.append = append
+        self.count = 0
+        self._file = None
+
+    def add(self, row, error):
+        if self._file is None:
+            self._file = open(self.path, 'a' if self.append else 'w')
+        entry = {'row': row, 'error': str(error).strip()}
+        self._file.write(json.dumps(entry, default=str) + '\n')
+        self.count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def build_values_upsert(table, columns, key=('id',)):
+    """Build an INSERT ... VALUES %s ON CONFLICT statement for execute_values"""
+    return sql.SQL("INSERT INTO {table} ({columns}) VALUES %s ON CONFLICT ({key}) {action}").format(
+        table=sql.Identifier(table),
+        columns=sql.SQL(', ').join(map(sql.Identifier, columns)),
+        key=sql.SQL(', ').join(map(sql.Identifier, key)),
+        action=conflict_action(columns, key),
+    )
+
+
+def build_values_delete_moved(table, identity, key):
+    """Build a DELETE ... USING (VALUES %s) statement for execute_values, given identity + key values
+
+    Removes the stored rows that the incoming rows move to another key.
+    """
+    return sql.SQL("DELETE FROM {table} t USING (VALUES %s) AS s ({columns}) WHERE {moved}").format(
+        table=sql.Identifier(table),
+        columns=sql.SQL(', ').join(map(sql.Identifier, dict.fromkeys(tuple(identity) + tuple(key)))),
+        moved=moved_condition(identity, key),
+    )
+
+
+def build_row_upsert(table, columns, key=('id',)):
+    """Build a single-row INSERT ... VALUES (%s, ...) ON CONFLICT statement"""
+    return sql.SQL("INSERT INTO {table} ({columns}) VALUES ({values}) ON CONFLICT ({key}) {action}").format(
+        table=sql.Identifier(table),
+        columns=sql.SQL(', ').join(map(sql.Identifier, columns)),
+        values=sql.SQL(', ').join(sql.Placeholder() * len(columns)),
+        key=sql.SQL(', ').join(map(sql.Identifier, key)),
+        action=conflict_action(columns, key),
+    )
+
+
+def iter_batches(rows, batch_size, key_positions=(0,)):
+    """Group rows into lists of at most batch_size, keeping the last row per key
+
+    A multi-row upsert cannot touch the same key twice, so duplicates inside
+    a batch are collapsed the same way sequential upserts would resolve them.
+    """
+    batch = {}
+    for row in rows:
+        batch[tuple(row[i] for i in key_positions)] = row
+        if len(batch) >= batch_size:
+            yield list(batch.values())
+            batch = {}
+    if batch:
+        yield list(batch.values())
+
+
+def _load_batch(cursor, statement, batch, on_reject, before_batch=None):
+    """Upsert one batch under a savepoint, bisecting it on failure"""
+    cursor.execute("SAVEPOINT import_batch")
+    try:
+        if before_batch:
+            before_batch(cursor, batch)
+        execute_values(cursor, statement, batch, page_size=len(batch))
+    except psycopg2.Error as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT import_batch")
+        if len(batch) == 1:
+            on_reject(batch[0], e)
+            return 0
+        middle = len(batch) // 2
+        return (_load_batch(cursor, statement, batch[:middle], on_reject, before_batch) +
+                _load_batch(cursor, statement, batch[middle:], on_reject, before_batch))
+    cursor.execute("RELEASE SAVEPOINT import_batch")
+    return len(batch)
+
+
+def batch_upsert(cursor, statement, rows, batch_size=DEFAULT_BATCH_SIZE,
+                 key_positions=(0,), on_reject=None, before_batch=None):
+    """Upsert rows in multi-row batches of a build_values_upsert statement
+
+    Returns the number of rows loaded. Rows that still fail on their own
+    are passed to on_reject(row, error) and skipped, so the surrounding
+    transaction stays usable. before_batch(cursor, batch) runs under each
+    batch's savepoint, ahead of its upsert.
+    """
+    on_reject = on_reject or (lambda row, error: None)
+    loaded = 0
+    for batch in iter_batches(rows, batch_size, key_positions):
+        loaded += _load_batch(cursor, statement, batch, on_reject, before_batch)
+    return loaded
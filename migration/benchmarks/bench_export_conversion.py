@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-row attendance conversion vs the column-wise chunk converter
+Run from the migration folder: python benchmarks/bench_export_conversion.py
+"""
+
+import argparse
+import os
+import random
+import sys
+import time as timer
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from export_formats import DEFAULT_CHUNK_SIZE, EXPORT_CONVERTERS
+
+convert_attendance = EXPORT_CONVERTERS['attendance']
+
+def legacy_timedelta_to_time(td):
+    """The per-value formatter the exporter used before column-wise conversion"""
+    if td is None or td == timedelta(0):
+        return None
+    total_seconds = int(td.total_seconds())
+    hours = total_seconds // 3600
+    minutes = (total_seconds % 3600) // 60
+    seconds = total_seconds % 60
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+def legacy_convert(record):
+    return {
+        'id': record[0],
+        'employee_name': record[1],
+        'date': record[2].isoformat() if record[2] else None,
+        'shift1_in': legacy_timedelta_to_time(record[3]),
+        'shift1_out': legacy_timedelta_to_time(record[4]),
+        'shift2_in': legacy_timedelta_to_time(record[5]),
+        'shift2_out': legacy_timedelta_to_time(record[6])
+    }
+
+def synthetic_rows(count):
+    """Attendance rows shaped like mysql.connector returns them (TIME -> timedelta)"""
+    rng = random.Random(42)
+    names = [f"Employee {i}" for i in range(40)]
+    start = date(2024, 1, 1)
+
+    def shift(base):
+        if rng.random() < 0.1:
+            return None
+        return timedelta(hours=base, minutes=rng.choice(range(0, 60, 5)))
+
+    return [
+        (i, rng.choice(names), start + timedelta(days=i // 40),
+         shift(9), shift(13), shift(14), shift(18))
+        for i in range(1, count + 1)
+    ]
+
+def best_of(repeats, function):
+    best = None
+    for _ in range(repeats):
+        start = timer.perf_counter()
+        function()
+        elapsed = timer.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare attendance export conversion speed")
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows)
+    chunks = [rows[i:i + args.chunk_size] for i in range(0, len(rows), args.chunk_size)]
+    assert [legacy_convert(r) for r in rows[:1000]] == convert_attendance(rows[:1000])
+
+    legacy = best_of(args.repeats, lambda: [legacy_convert(r) for r in rows])
+    columnar = best_of(args.repeats, lambda: [convert_attendance(chunk) for chunk in chunks])
+
+    print(f"📊 {len(rows)} attendance rows in chunks of {args.chunk_size}, best of {args.repeats}")
+    print(f"  per-row:      {legacy:.3f}s  ({len(rows) / legacy:,.0f} rows/s)")
+    print(f"  column-wise:  {columnar:.3f}s  ({len(rows) / columnar:,.0f} rows/s)")
+    print(f"  speedup:      {legacy / columnar:.1f}x")
+
+if __name__ == "__main__":
+    main()
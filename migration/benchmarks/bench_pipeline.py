@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Stage benchmarks on synthetic exports, compared against a stored baseline
+Generates exports at each --scale, then measures rows/s and peak Python
+memory of parse_datetime, record conversion, JSON parsing and (with --pg-dsn)
+a COPY load into a throwaway PostgreSQL database.
+Run from the migration folder:
+    python benchmarks/bench_pipeline.py --scales 1 10 100 --save-baseline
+    python benchmarks/bench_pipeline.py --scales 1 10 100 --pg-dsn "host=localhost user=postgres"
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time as timer
+import tracemalloc
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, '..'))
+
+from bench_value_conversion import legacy_convert
+from export_reader import open_export
+from synthetic_exports import ExportModel, write_synthetic_exports
+from table_loader import LOADERS
+from table_specs import TABLE_SPECS
+
+DEFAULT_BASELINE = os.path.join(BENCHMARKS_DIR, 'baseline.json')
+
+# A stage regresses when it is this much slower, or uses this much more memory, than the baseline
+DEFAULT_TOLERANCE = 0.25
+
+
+def export_paths(directory):
+    return {table: os.path.join(directory, spec.export_file) for table, spec in TABLE_SPECS.items()}
+
+
+def bench_parse_datetime(paths):
+    records = list(open_export(paths['attendance']))
+
+    def run():
+        for record in records:
+            legacy_convert(record)
+        return len(records)
+    return run
+
+
+def bench_conversion(paths):
+    tables = [(LOADERS[table].convert, list(open_export(path))) for table, path in paths.items()]
+
+    def run():
+        for convert, records in tables:
+            for record in records:
+                convert(record)
+        return sum(len(records) for _, records in tables)
+    return run
+
+
+def bench_json_parsing(paths):
+    def run():
+        return sum(sum(1 for _ in open_export(path)) for path in paths.values())
+    return run
+
+
+def bench_load(paths, dsn):
+    """COPY every table into a fresh database, dropped again afterwards"""
+    import psycopg2
+    import setup_supabase_tables
+
+    def run():
+        name = f"migration_bench_{os.getpid()}"
+        admin = psycopg2.connect(dsn)
+        admin.autocommit = True
+        admin.cursor().execute(f"DROP DATABASE IF EXISTS {name}")
+        admin.cursor().execute(f"CREATE DATABASE {name}")
+        try:
+            connection = psycopg2.connect(dsn, dbname=name)
+            try:
+                cursor = connection.cursor()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    setup_supabase_tables.create_tables(cursor)
+                rows = sum(LOADERS[table].copy(cursor, map(LOADERS[table].convert, open_export(path)))[0]
+                           for table, path in paths.items())
+                connection.commit()
+            finally:
+                connection.close()
+        finally:
+            admin.cursor().execute(f"DROP DATABASE IF EXISTS {name}")
+            admin.close()
+        return rows
+    return run
+
+
+def measure(run, repeats):
+    """Return (rows, best rows/s, peak traced MB); memory is traced in a separate run"""
+    best = None
+    for _ in range(repeats):
+        start = timer.perf_counter()
+        rows = run()
+        elapsed = timer.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return rows, rows / best, peak / 2 ** 20
+
+
+def compare(results, baseline, tolerance):
+    """Return a message per stage that is slower or hungrier than its baseline"""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        if result['rows_per_second'] < base['rows_per_second'] * (1 - tolerance):
+            regressions.append(f"{key}: {result['rows_per_second']:,.0f} rows/s, "
+                               f"baseline {base['rows_per_second']:,.0f}")
+        if result['peak_mb'] > base['peak_mb'] * (1 + tolerance) + 1:
+            regressions.append(f"{key}: peak {result['peak_mb']:.1f} MB, baseline {base['peak_mb']:.1f} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the migration stages on synthetic exports")
+    parser.add_argument('--scales', type=float, nargs='+', default=[1, 10],
+                        help="sizes relative to the real exports")
+    parser.add_argument('--model-dir', default='.', help="folder with the real *_export.json files")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--pg-dsn', default=os.environ.get('BENCH_PG_DSN'),
+                        help="libpq connection string of a local PostgreSQL to load into "
+                             "(a throwaway database is created and dropped); the load stage is skipped without it")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    stages = {
+        'parse_datetime': bench_parse_datetime,
+        'conversion': bench_conversion,
+        'json_parsing': bench_json_parsing,
+    }
+    if args.pg_dsn:
+        stages['load'] = lambda paths: bench_load(paths, args.pg_dsn)
+    else:
+        print("⚠️ No --pg-dsn or BENCH_PG_DSN; skipping the PostgreSQL load stage")
+
+    model = ExportModel(args.model_dir)
+    results = {}
+    for scale in args.scales:
+        with tempfile.TemporaryDirectory() as directory:
+            counts = write_synthetic_exports(model, scale, directory)
+            print(f"\n📊 Scale {scale:g}: {sum(counts.values())} rows")
+            paths = export_paths(directory)
+            for stage, bench in stages.items():
+                rows, rate, peak = measure(bench(paths), args.repeats)
+                results[f"{stage}@{scale:g}"] = {'rows': rows, 'rows_per_second': round(rate, 1),
+                                                 'peak_mb': round(peak, 2)}
+                print(f"  {stage:<15} {rows:>9} rows  {rate:>12,.0f} rows/s  peak {peak:8.1f} MB")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Saved baseline to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"\n⚠️ No baseline at {args.baseline}; run with --save-baseline first")
+        return
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regressions beyond {args.tolerance:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print(f"\n✅ No regressions beyond {args.tolerance:.0%} of the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: legacy parse_datetime vs the cached column-typed conversion plan
+Run from the migration folder: python benchmarks/bench_value_conversion.py
+"""
+
+import argparse
+import os
+import sys
+import time as timer
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from export_reader import open_export
+from table_specs import TABLE_SPECS
+from value_converters import ConversionPlan, parse_date, parse_time
+
+ATTENDANCE_COLUMNS = TABLE_SPECS['attendance'].columns
+TEMPORAL_COLUMNS = {'date', 'shift1_in', 'shift1_out', 'shift2_in', 'shift2_out'}
+
+def parse_datetime(value):
+    """The per-value parser the import scripts used before conversion plans"""
+    if not value:
+        return None
+    try:
+        if 'T' in value:
+            return datetime.fromisoformat(value.replace('Z', '+00:00'))
+        elif len(value) == 10:  # Date only
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        elif len(value) == 8:  # Time only
+            return datetime.strptime(value, '%H:%M:%S').time()
+    except:
+        return None
+    return None
+
+def legacy_convert(record):
+    return tuple(
+        parse_datetime(record[column]) if column in TEMPORAL_COLUMNS else record[column]
+        for column in ATTENDANCE_COLUMNS
+    )
+
+def best_of(repeats, function, records):
+    best = None
+    for _ in range(repeats):
+        start = timer.perf_counter()
+        for record in records:
+            function(record)
+        elapsed = timer.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare attendance value conversion speed")
+    parser.add_argument('--file', default='attendance_export.json')
+    parser.add_argument('--scale', type=int, default=20, help="repeat the file's records this many times")
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    records = list(open_export(args.file)) * args.scale
+    plan = ConversionPlan.for_spec(TABLE_SPECS['attendance'])
+    assert [legacy_convert(r) for r in records[:1000]] == [plan.convert(r) for r in records[:1000]]
+
+    parse_date.cache_clear()
+    parse_time.cache_clear()
+    legacy = best_of(args.repeats, legacy_convert, records)
+    planned = best_of(args.repeats, plan.convert, records)
+
+    print(f"📊 {len(records)} attendance records, best of {args.repeats}")
+    print(f"  parse_datetime:  {legacy:.3f}s  ({len(records) / legacy:,.0f} rows/s)")
+    print(f"  ConversionPlan:  {planned:.3f}s  ({len(records) / planned:,.0f} rows/s)")
+    print(f"  speedup:         {legacy / planned:.1f}x")
+    print(f"  cache:           date {parse_date.cache_info().currsize}, time {parse_time.cache_info().currsize} distinct values")
+
+if __name__ == "__main__":
+    main()
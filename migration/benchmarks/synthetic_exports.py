@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Synthetic *_export.json files at any scale, modelled on the real exports
+Scale 1 gives about as many rows as the real files; scale 100 has 100 times
+the employees, each with the same attendance and expense pattern.
+Run from the migration folder:
+    python benchmarks/synthetic_exports.py --scale 100 --output-dir /tmp/exports
+"""
+
+import argparse
+import os
+import random
+import sys
+from collections import Counter
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from export_formats import FORMAT_SUFFIXES, format_filename, open_writer
+from export_reader import open_export
+from table_specs import TABLE_SPECS
+
+SHIFT_COLUMNS = ('shift1_in', 'shift1_out', 'shift2_in', 'shift2_out')
+
+# Placeholder dates in the real attendance export that are not working days
+PLACEHOLDER_BEFORE = '2000-01-01'
+
+
+class ExportModel:
+    """Distributions of the real exports that the synthetic data reproduces"""
+
+    def __init__(self, directory='.'):
+        def records(table):
+            return list(open_export(os.path.join(directory, TABLE_SPECS[table].export_file)))
+
+        self.names = [employee['name'] for employee in records('employees')]
+        attendance = [r for r in records('attendance') if r['date'] >= PLACEHOLDER_BEFORE]
+        days = Counter(r['employee_name'] for r in attendance)
+        # Attendance rows per employee; employees with none still get a few
+        self.days = {name: days.get(name, 1) for name in self.names}
+        self.start = date.fromisoformat(min(r['date'] for r in attendance))
+        # Which shift times a day has (e.g. only shift 1), with the observed times
+        self.patterns = Counter(tuple(r[column] is not None for column in SHIFT_COLUMNS) for r in attendance)
+        self.times = {column: [r[column] for r in attendance if r[column] is not None] for column in SHIFT_COLUMNS}
+
+        travel = records('travel_expenses')
+        self.travel_rate = len(travel) / len(attendance)
+        self.distances = [r['distance'] for r in travel if r['distance']] or [10.0]
+        self.rates = [r['amount'] / r['distance'] for r in travel if r['distance']] or [3.5]
+        self.readings_share = sum(r['start_reading'] is not None for r in travel) / max(len(travel), 1)
+
+        general = records('general_expenses')
+        self.general_rate = len(general) / len(attendance)
+        self.descriptions = [r['description'] for r in general] or ['expense']
+        self.amounts = [r['amount'] for r in general] or [50.0]
+
+        advances = records('advances')
+        self.advance_rate = len(advances) / len(attendance)
+        self.advance_amounts = [r['amount'] for r in advances] or [1000.0]
+
+
+def synthetic_tables(model, scale, seed=42):
+    """Return {table: record iterable} for a synthetic export at scale
+
+    Each real employee is repeated int(scale) times (a fractional scale
+    keeps that share of them); copies get a numbered name. Every employee
+    works their modelled number of consecutive days, at most one attendance
+    row per day, and expenses fall on those days.
+    """
+    copies = max(1, int(scale))
+    keep = min(1.0, scale)
+    rng = random.Random(seed)
+    employees = [
+        (name if copy == 0 else f"{name} {copy + 1}", model.days[name])
+        for copy in range(copies) for name in model.names
+        if keep >= 1 or rng.random() < keep
+    ]
+    patterns, weights = zip(*model.patterns.items())
+
+    def employee_records():
+        for number, (name, _) in enumerate(employees, 1):
+            yield {'id': number, 'name': name}
+
+    def workdays(table):
+        rng = random.Random(f"{seed}:{table}")
+        for name, days in employees:
+            for day in range(days):
+                yield rng, name, (model.start + timedelta(days=day)).isoformat()
+
+    def attendance():
+        for number, (rng, name, day) in enumerate(workdays('attendance'), 1):
+            present = rng.choices(patterns, weights)[0]
+            record = {'id': number, 'employee_name': name, 'date': day}
+            for column, has_time in zip(SHIFT_COLUMNS, present):
+                record[column] = rng.choice(model.times[column]) if has_time and model.times[column] else None
+            yield record
+
+    def travel_expenses():
+        number = 0
+        for rng, name, day in workdays('travel_expenses'):
+            if rng.random() >= model.travel_rate:
+                continue
+            number += 1
+            distance = rng.choice(model.distances)
+            rate = rng.choice(model.rates)
+            readings = rng.random() < model.readings_share
+            start = float(rng.randrange(100, 50000)) if readings else None
+            yield {'id': number, 'employee_name': name, 'date': day,
+                   'start_reading': start, 'end_reading': start + distance if readings else None,
+                   'distance': distance, 'rate': rate if readings else None,
+                   'amount': round(distance * rate, 2)}
+
+    def general_expenses():
+        number = 0
+        for rng, name, day in workdays('general_expenses'):
+            if rng.random() >= model.general_rate:
+                continue
+            number += 1
+            yield {'id': number, 'employee_name': name, 'date': day,
+                   'description': rng.choice(model.descriptions), 'amount': rng.choice(model.amounts)}
+
+    def advances():
+        number = 0
+        for rng, name, day in workdays('advances'):
+            if rng.random() >= model.advance_rate:
+                continue
+            number += 1
+            yield {'id': number, 'employee_name': name, 'date': day,
+                   'amount': rng.choice(model.advance_amounts), 'notes': None}
+
+    return {
+        'employees': employee_records(),
+        'attendance': attendance(),
+        'travel_expenses': travel_expenses(),
+        'general_expenses': general_expenses(),
+        'advances': advances(),
+    }
+
+
+def write_synthetic_exports(model, scale, output_dir, fmt='json', seed=42):
+    """Write every table's synthetic export into output_dir; returns {table: rows}"""
+    os.makedirs(output_dir, exist_ok=True)
+    counts = {}
+    for table, records in synthetic_tables(model, scale, seed).items():
+        path = os.path.join(output_dir, format_filename(TABLE_SPECS[table].export_file, fmt))
+        f, writer = open_writer(path, fmt, table)
+        with f:
+            for record in records:
+                writer.write(record)
+            writer.close()
+        counts[table] = writer.count
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic exports modelled on the real ones")
+    parser.add_argument('--scale', type=float, default=10, help="size relative to the real exports")
+    parser.add_argument('--output-dir', required=True)
+    parser.add_argument('--model-dir', default='.', help="folder with the real *_export.json files")
+    parser.add_argument('--format', choices=list(FORMAT_SUFFIXES), default='json')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    counts = write_synthetic_exports(ExportModel(args.model_dir), args.scale, args.output_dir,
+                                     args.format, args.seed)
+    for table, count in counts.items():
+        print(f"✅ {count} {table} records")
+
+
+if __name__ == "__main__":
+    main()
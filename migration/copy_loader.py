@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+COPY-based bulk loader for Supabase PostgreSQL
+Streams rows into a temporary staging table and merges them with one upsert
+"""
+
+from datetime import date, datetime, time
+from psycopg2 import sql
+
+
+def format_copy_value(value):
+    """Format a Python value for the PostgreSQL COPY text format"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, str):
+        return (value.replace('\\', '\\\\')
+                     .replace('\t', '\\t')
+                     .replace('\n', '\\n')
+                     .replace('\r', '\\r'))
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    return str(value)
+
+
+class CopyStream:
+    """File-like object that feeds rows to copy_expert one buffer at a time"""
+
+    def __init__(self, rows):
+        self._lines = ('\t'.join(map(format_copy_value, row)) + '\n' for row in rows)
+        self._buffer = ''
+        self.rows = 0
+
+    def read(self, size=-1):
+        chunks = [self._buffer]
+        length = len(self._buffer)
+        if size < 0 or length < size:
+            for line in self._lines:
+                chunks.append(line)
+                length += len(line)
+                self.rows += 1
+                if 0 <= size <= length:
+                    break
+        data = ''.join(chunks)
+        if size < 0:
+            self._buffer = ''
+            return data
+        self._buffer = data[size:]
+        return data[:size]
+
+
+def conflict_action(columns, key):
+    """DO UPDATE SET every non-key column from EXCLUDED, or DO NOTHING if there are none"""
+    updates = [
+        sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(column))
+        for column in columns if column not in key
+    ]
+    if not updates:
+        return sql.SQL("DO NOTHING")
+    return sql.SQL("DO UPDATE SET ") + sql.SQL(', ').join(updates)
+
+
+def moved_condition(identity, key):
+    """WHERE clause matching stored rows t to incoming rows s of the same identity under another key"""
+    def row(alias, columns):
+        return sql.SQL('({})').format(sql.SQL(', ').join(sql.Identifier(alias, column) for column in columns))
+    return sql.SQL("{} = {} AND {} IS DISTINCT FROM {}").format(
+        row('t', identity), row('s', identity), row('t', key), row('s', key))
+
+
+class CopyStatements:
+    """The staging, COPY and merge statements for one table, composed once
+
+    identity is what names a row when the unique key is wider than that
+    (id plus the partition column, say). Staged rows are then collapsed per
+    identity, and delete_moved removes the stored rows whose key changed,
+    which the upsert would otherwise leave behind.
+    """
+
+    def __init__(self, table, columns, key=('id',), identity=None):
+        target = sql.Identifier(table)
+        self.staging = staging = sql.Identifier(f"{table}_staging")
+        column_list = sql.SQL(', ').join(map(sql.Identifier, columns))
+        key_list = sql.SQL(', ').join(map(sql.Identifier, key))
+        identity = tuple(identity or key)
+        identity_list = sql.SQL(', ').join(map(sql.Identifier, identity))
+
+        # Only the loaded columns and none of the target's constraints, so a
+        # column left to its default (a SERIAL id, say) needs no value here
+        self.create = sql.SQL("""
+            CREATE TEMP TABLE {staging} ON COMMIT DROP AS
+            SELECT {columns} FROM {target} WITH NO DATA;
+            ALTER TABLE {staging} ADD COLUMN copy_seq BIGSERIAL
+        """).format(staging=staging, target=target, columns=column_list)
+        self.copy = sql.SQL("COPY {staging} ({columns}) FROM STDIN").format(
+            staging=staging, columns=column_list)
+        self.merge = sql.SQL("""
+            INSERT INTO {target} ({columns})
+            SELECT DISTINCT ON ({identity}) {columns}
+            FROM {staging}
+            ORDER BY {identity}, copy_seq DESC
+            ON CONFLICT ({key}) {action}
+        """).format(target=target, staging=staging, columns=column_list, identity=identity_list,
+                    key=key_list, action=conflict_action(columns, key))
+        self.delete_moved = None
+        if identity != tuple(key):
+            self.delete_moved = sql.SQL("""
+                DELETE FROM {target} t
+                USING (SELECT DISTINCT ON ({identity}) {columns} FROM {staging}
+                       ORDER BY {identity}, copy_seq DESC) s
+                WHERE {moved}
+            """).format(target=target, staging=staging, identity=identity_list,
+                        columns=sql.SQL(', ').join(map(sql.Identifier, dict.fromkeys(identity + tuple(key)))),
+                        moved=moved_condition(identity, key))
+        self.drop = sql.SQL("DROP TABLE {staging}").format(staging=staging)
+
+
+def copy_upsert(cursor, statements, rows, before_merge=None):
+    """COPY rows into a staging table, then upsert them into the target in one statement
+
+    Later rows win over earlier rows with the same key, which matches the
+    end state of running one INSERT ... ON CONFLICT per row in file order.
+    before_merge(cursor, staging) runs once the rows are staged.
+    Returns (rows_copied, rows_merged).
+    """
+    cursor.execute(statements.create)
+    stream = CopyStream(rows)
+    cursor.copy_expert(statements.copy, stream)
+    if before_merge:
+        before_merge(cursor, statements.staging)
+    if statements.delete_moved:
+        cursor.execute(statements.delete_moved)
+    cursor.execute(statements.merge)
+    merged = cursor.rowcount
+    cursor.execute(statements.drop)
+    return stream.rows, merged
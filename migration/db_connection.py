@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Shared database connections for the migration scripts
+Settings come from the environment (falling back to the original hosts),
+connections use TCP keepalives, transient failures are retried with
+jittered exponential backoff, and Supabase connections come from a bounded
+pool. Driver modules are imported lazily, so the export can run where only
+mysql-connector is installed and asyncpg is only needed for --mode pipeline.
+"""
+
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_ATTEMPTS = 5
+DEFAULT_BASE_DELAY = 1.0
+MAX_DELAY = 30.0
+
+# Port of the Supabase transaction pooler (Supavisor)
+POOLER_PORT = 6543
+
+# Retryable SQLSTATEs besides connection exceptions (class 08): serialization
+# failure, deadlock, server shutting down or starting up, too many connections
+TRANSIENT_SQLSTATES = {'40001', '40P01', '57P01', '57P02', '57P03', '53300'}
+
+# MySQL: can't connect, server gone away, lost connection, lock wait timeout, deadlock
+TRANSIENT_MYSQL_ERRNOS = {2003, 2006, 2013, 2055, 1205, 1213}
+
+# Failures that retrying cannot fix
+PERMANENT_MESSAGES = ('authentication failed', 'Access denied', 'does not exist')
+
+KEEPALIVES = {
+    'keepalives': 1,
+    'keepalives_idle': 30,
+    'keepalives_interval': 10,
+    'keepalives_count': 5,
+}
+
+
+def env_flag(name):
+    return os.environ.get(name, '').lower() in ('1', 'true', 'yes')
+
+
+def supabase_settings():
+    """Supabase connection settings from SUPABASE_DB_* (the Next.js app's names)"""
+    port = int(os.environ.get('SUPABASE_DB_PORT', '5432'))
+    return {
+        'host': os.environ.get('SUPABASE_DB_HOST', 'db.sevlfbqydeludjfzatfe.supabase.co'),
+        'database': os.environ.get('SUPABASE_DB_NAME', 'postgres'),
+        'user': os.environ.get('SUPABASE_DB_USER', 'postgres'),
+        'password': os.environ.get('SUPABASE_DB_PASSWORD', 'puravbhatt0504'),
+        'port': port,
+        'sslmode': os.environ.get('SUPABASE_DB_SSLMODE', 'require'),
+        'connect_timeout': int(os.environ.get('SUPABASE_DB_CONNECT_TIMEOUT', '10')),
+        'pooler': env_flag('SUPABASE_DB_POOLER') or port == POOLER_PORT,
+    }
+
+
+def mysql_settings():
+    """PythonAnywhere MySQL settings from MYSQL_*"""
+    return {
+        'host': os.environ.get('MYSQL_HOST', 'finalboss0504.mysql.pythonanywhere-services.com'),
+        'database': os.environ.get('MYSQL_DATABASE', 'finalboss0504$default'),
+        'user': os.environ.get('MYSQL_USER', 'finalboss0504'),
+        'password': os.environ.get('MYSQL_PASSWORD', 'puravbhatt0504'),
+        'connection_timeout': int(os.environ.get('MYSQL_CONNECT_TIMEOUT', '10')),
+    }
+
+
+def is_transient(error):
+    """True for errors worth retrying: dropped connections, deadlocks, restarts"""
+    message = str(error)
+    if any(text in message for text in PERMANENT_MESSAGES):
+        return False
+    errno = getattr(error, 'errno', None)
+    if isinstance(errno, int) and type(error).__module__.startswith('mysql'):
+        return errno in TRANSIENT_MYSQL_ERRNOS
+    # psycopg2 names the SQLSTATE pgcode, asyncpg sqlstate
+    code = getattr(error, 'pgcode', None) or getattr(error, 'sqlstate', None)
+    if code:
+        return code.startswith('08') or code in TRANSIENT_SQLSTATES
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    return type(error).__name__ in ('OperationalError', 'InterfaceError', 'ConnectionError')
+
+
+def backoff_delay(attempt, base_delay=DEFAULT_BASE_DELAY):
+    """Exponential backoff with jitter, so parallel workers do not retry in lockstep"""
+    delay = min(MAX_DELAY, base_delay * 2 ** (attempt - 1))
+    return random.uniform(delay / 2, delay)
+
+
+def retry_transient(operation, attempts=DEFAULT_ATTEMPTS, base_delay=DEFAULT_BASE_DELAY, what="Database operation"):
+    """Run operation(), retrying it after transient errors
+
+    operation must be safe to repeat: everything it did in a failed attempt
+    has to have been rolled back.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return operation()
+        except Exception as e:
+            if attempt == attempts or not is_transient(e):
+                raise
+            delay = backoff_delay(attempt, base_delay)
+            print(f"{what} hit a transient error ({str(e).strip()}); "
+                  f"retrying in {delay:.1f}s ({attempt + 1}/{attempts})")
+            time.sleep(delay)
+
+
+def connect_supabase(settings=None):
+    """Open a Supabase connection with keepalives, retrying transient failures
+
+    In pooler mode no startup parameters are sent; the scripts keep all their
+    session state (temp tables, SET LOCAL, savepoints, cursors) inside single
+    transactions, which is what a transaction pooler requires.
+    """
+    import psycopg2
+
+    settings = dict(settings or supabase_settings())
+    pooler = settings.pop('pooler')
+    if not pooler:
+        settings['application_name'] = 'admin-portal-migration'
+    return retry_transient(lambda: psycopg2.connect(**settings, **KEEPALIVES),
+                           what="Connecting to Supabase")
+
+
+async def connect_supabase_async(settings=None):
+    """Open an asyncpg Supabase connection
+
+    Behind the transaction pooler, prepared statements cannot be cached
+    on the server, so the statement cache is turned off. Transient
+    failures are left to the caller, which retries the whole load.
+    """
+    import asyncpg
+
+    settings = dict(settings or supabase_settings())
+    server_settings = None
+    if not settings['pooler']:
+        server_settings = {
+            'application_name': 'admin-portal-migration',
+            'tcp_keepalives_idle': str(KEEPALIVES['keepalives_idle']),
+            'tcp_keepalives_interval': str(KEEPALIVES['keepalives_interval']),
+            'tcp_keepalives_count': str(KEEPALIVES['keepalives_count']),
+        }
+    return await asyncpg.connect(
+        host=settings['host'], port=settings['port'], user=settings['user'],
+        password=settings['password'], database=settings['database'],
+        ssl=settings['sslmode'],
+        timeout=settings['connect_timeout'],
+        statement_cache_size=0 if settings['pooler'] else 100,
+        server_settings=server_settings)
+
+
+def create_supabase_connection():
+    """Create connection to Supabase database"""
+    try:
+        connection = connect_supabase()
+        print("Connected to Supabase database")
+        return connection
+    except Exception as e:
+        print(f"Supabase connection error: {e}")
+        return None
+
+
+def connect_mysql(settings=None):
+    """Open a PythonAnywhere MySQL connection, retrying transient failures"""
+    import mysql.connector
+
+    settings = settings or mysql_settings()
+    return retry_transient(lambda: mysql.connector.connect(**settings),
+                           what="Connecting to MySQL")
+
+
+class ConnectionPool:
+    """Bounded pool of Supabase connections
+
+    get() blocks while size connections are checked out, reuses idle ones
+    and opens new ones (with retries) as needed; put() returns a connection,
+    discarding it if it was closed or broken.
+    """
+
+    def __init__(self, size=1, settings=None):
+        self.settings = settings or supabase_settings()
+        self.pooler = self.settings['pooler']
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = queue.LifoQueue()
+
+    def get(self):
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    connection = self._idle.get_nowait()
+                except queue.Empty:
+                    return connect_supabase(self.settings)
+                if not connection.closed:
+                    return connection
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def put(self, connection):
+        try:
+            if not connection.closed:
+                try:
+                    connection.rollback()
+                    self._idle.put(connection)
+                except Exception:
+                    connection.close()
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        connection = self.get()
+        try:
+            yield connection
+        finally:
+            self.put(connection)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Employee name -> id resolution for the Next.js schema
+The legacy exports key rows by employee_name, the Next.js tables by
+employee_id; this index rewrites records while they stream past, so no
+UPDATE ... FROM join is needed after loading
+"""
+
+import json
+import os
+from collections import Counter
+
+DEFAULT_UNMATCHED_FILE = 'unmatched_employees.jsonl'
+
+
+def normalize_name(name):
+    """Case- and whitespace-insensitive form of an employee name"""
+    return ' '.join(name.split()).casefold()
+
+
+class EmployeeIndex:
+    """Hash index of normalised employee names to ids"""
+
+    def __init__(self, employees):
+        self.ids = {}
+        self.duplicates = []
+        for employee in employees:
+            key = normalize_name(employee['name'])
+            if key in self.ids:
+                self.duplicates.append(employee)
+                continue
+            self.ids[key] = employee['id']
+        self._resolved = {}
+        self.unmatched = {}
+
+    def remap(self, ids):
+        """Resolve names to ids[legacy id] instead; names whose id is missing stop matching"""
+        self.ids = {key: ids[employee_id] for key, employee_id in self.ids.items() if employee_id in ids}
+        self._resolved = {}
+
+    def resolve(self, name):
+        """Return the id for a name, or None; results are cached per raw name"""
+        try:
+            return self._resolved[name]
+        except KeyError:
+            employee_id = self.ids.get(normalize_name(name)) if isinstance(name, str) else None
+            self._resolved[name] = employee_id
+            return employee_id
+
+    def rewrite(self, table, records):
+        """Yield records with employee_name replaced by employee_id
+
+        Records whose name is not in the index are dropped and counted per
+        name and table, for write_unmatched().
+        """
+        resolve = self.resolve
+        for record in records:
+            name = record.pop('employee_name', None)
+            employee_id = resolve(name)
+            if employee_id is None:
+                self.unmatched.setdefault(name, Counter())[table] += 1
+                continue
+            record['employee_id'] = employee_id
+            yield record
+
+    def write_unmatched(self, path=DEFAULT_UNMATCHED_FILE):
+        """Write one line per unmatched name with its row count per table
+
+        Returns the number of names written; a stale file is removed when
+        every name matched.
+        """
+        if not self.unmatched:
+            if os.path.exists(path):
+                os.remove(path)
+            return 0
+        with open(path, 'w') as f:
+            for name, tables in self.unmatched.items():
+                f.write(json.dumps({'employee_name': name, 'rows': dict(tables)}) + '\n')
+        return len(self.unmatched)
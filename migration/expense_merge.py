@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Merge the legacy expense exports into the Next.js expenses table
+Travel, general and advance records are mapped to the unified expenses
+shape while they stream, so the expense data is loaded once, in one COPY
+"""
+
+from itertools import chain
+from export_reader import open_export
+from table_specs import TABLE_SPECS
+
+
+def travel_expense(record):
+    """travel_expenses record -> expenses record; distance becomes kilometers"""
+    readings = [record['start_reading'], record['end_reading'], record['rate']]
+    return {
+        'legacy_source': 'travel_expenses',
+        'legacy_id': record['id'],
+        'employee_name': record['employee_name'],
+        'category': 'Travel',
+        'description': 'Travel expense',
+        'amount': record['amount'],
+        'date': record['date'],
+        'kilometers': record['distance'],
+        'expense_type': 'Travel',
+        'notes': ("Odometer {} to {}, rate {}".format(*readings)
+                  if any(value is not None for value in readings) else None),
+    }
+
+
+def general_expense(record):
+    """general_expenses record -> expenses record"""
+    return {
+        'legacy_source': 'general_expenses',
+        'legacy_id': record['id'],
+        'employee_name': record['employee_name'],
+        'category': 'General',
+        'description': record['description'],
+        'amount': record['amount'],
+        'date': record['date'],
+        'kilometers': None,
+        'expense_type': 'General',
+        'notes': None,
+    }
+
+
+def advance_expense(record):
+    """advances record -> expenses record in its own Advance category"""
+    return {
+        'legacy_source': 'advances',
+        'legacy_id': record['id'],
+        'employee_name': record['employee_name'],
+        'category': 'Advance',
+        'description': 'Advance',
+        'amount': record['amount'],
+        'date': record['date'],
+        'kilometers': None,
+        'expense_type': 'Advance',
+        'notes': record['notes'],
+    }
+
+
+# Legacy table -> mapper to the unified expenses shape
+EXPENSE_SOURCES = {
+    'travel_expenses': travel_expense,
+    'general_expenses': general_expense,
+    'advances': advance_expense,
+}
+
+
+def merged_expenses(index):
+    """Stream every legacy expense export as unified, employee_id-keyed records
+
+    index is the EmployeeIndex; unmatched names are counted against the
+    legacy table they came from.
+    """
+    return chain.from_iterable(
+        index.rewrite(table, map(mapper, open_export(TABLE_SPECS[table].export_file)))
+        for table, mapper in EXPENSE_SOURCES.items()
+    )
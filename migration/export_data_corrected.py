@@ -4,20 +4,32 @@ Corrected data export from PythonAnywhere MySQL to JSON files
 Based on actual table structures found
 """
 
-import mysql.connector
 from mysql.connector import Error
+import argparse
 import json
-from datetime import datetime, date, time, timedelta
+import os
+import queue
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from db_connection import connect_mysql
+from export_formats import (DEFAULT_CHUNK_SIZE, EXPORT_CONVERTERS, FORMAT_SUFFIXES, export_format,
+                            format_filename, open_writer)
+from pipeline_metrics import DEFAULT_PROGRESS_INTERVAL, RunMetrics
+from table_specs import TABLE_SPECS
+
+DEFAULT_ROWS_PER_PART = 100000
+DEFAULT_STATE_FILE = 'export_state.json'
+DEFAULT_RESCAN_DAYS = 3
+DEFAULT_METRICS_FILE = 'export_metrics.json'
+
+# Append-mostly tables that can be exported incrementally by id and date
+INCREMENTAL_TABLES = tuple(name for name, spec in TABLE_SPECS.items() if spec.incremental)
 
 def create_mysql_connection():
     """Create connection to PythonAnywhere MySQL database"""
     try:
-        connection = mysql.connector.connect(
-            host='finalboss0504.mysql.pythonanywhere-services.com',
-            database='finalboss0504$default',
-            user='finalboss0504',
-            password='puravbhatt0504'
-        )
+        connection = connect_mysql()
         
         if connection.is_connected():
             print("✅ Connected to PythonAnywhere MySQL database")
@@ -30,134 +42,388 @@ def create_mysql_connection():
         print(f"❌ MySQL connection error: {e}")
         return None
 
-def convert_timedelta_to_time(td):
-    """Convert timedelta to time string"""
-    if td is None or td == timedelta(0):
-        return None
-    total_seconds = int(td.total_seconds())
-    hours = total_seconds // 3600
-    minutes = (total_seconds % 3600) // 60
-    seconds = total_seconds % 60
-    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-
-def export_employees(cursor):
-    """Export employees data"""
-    print("📋 Exporting employees...")
+def export_table(cursor, spec):
+    """Export one table in memory"""
+    title = spec.name.replace('_', ' ')
+    print(f"📋 Exporting {title}...")
     try:
-        cursor.execute("SELECT id, name FROM employees")
-        records = cursor.fetchall()
+        cursor.execute(spec.select_sql)
+        data = EXPORT_CONVERTERS[spec.name](cursor.fetchall())
         
-        data = []
-        for record in records:
-            data.append({
-                'id': record[0],
-                'name': record[1]
-            })
-        
-        print(f"📊 Exported {len(data)} employees")
+        print(f"📊 Exported {len(data)} {spec.label}")
         return data
     except Error as e:
-        print(f"❌ Error exporting employees: {e}")
-        return []
+        print(f"❌ Error exporting {title}: {e}")
+        return None
+
+def stream_export(connection, table, query, convert, filename, chunk_size=DEFAULT_CHUNK_SIZE, params=None,
+                  metrics=None):
+    """Export a table straight to its JSON file, one fetchmany chunk at a time
 
-def export_attendance(cursor):
-    """Export attendance data"""
-    print("📋 Exporting attendance...")
+    Uses an unbuffered cursor so rows stay on the server until fetched, and
+    writes to a temporary file so a failed export never leaves a truncated file.
+    Fetch, conversion and write times are recorded per chunk in metrics.
+    """
+    print(f"📋 Streaming {table.replace('_', ' ')} to {filename}...")
+    stats = (metrics or RunMetrics('export')).start(table, filename if '.part' in filename else None)
+    cursor = connection.cursor(buffered=False)
+    temp_filename = filename + '.tmp'
     try:
-        cursor.execute("SELECT id, employee_name, date, shift1_in, shift1_out, shift2_in, shift2_out FROM attendance")
-        records = cursor.fetchall()
-        
-        data = []
-        for record in records:
-            data.append({
-                'id': record[0],
-                'employee_name': record[1],
-                'date': record[2].isoformat() if record[2] else None,
-                'shift1_in': convert_timedelta_to_time(record[3]),
-                'shift1_out': convert_timedelta_to_time(record[4]),
-                'shift2_in': convert_timedelta_to_time(record[5]),
-                'shift2_out': convert_timedelta_to_time(record[6])
-            })
-        
-        print(f"📊 Exported {len(data)} attendance records")
-        return data
+        with stats.stage('read'):
+            cursor.execute(query, params)
+        f, writer = open_writer(temp_filename, export_format(filename), table, chunk_size)
+        with f:
+            while True:
+                with stats.stage('read'):
+                    records = cursor.fetchmany(chunk_size)
+                if not records:
+                    break
+                with stats.stage('transform'):
+                    converted = convert(records)
+                with stats.stage('write'):
+                    for record in converted:
+                        writer.write(record)
+                stats.add(len(records))
+            with stats.stage('write'):
+                writer.close()
+        os.replace(temp_filename, filename)
+        stats.finish(writer.count, nbytes=os.path.getsize(filename))
+        print(f"✅ Saved {writer.count} {table} records to {filename}")
+        return writer.count
     except Error as e:
-        print(f"❌ Error exporting attendance: {e}")
-        return []
+        print(f"❌ Error exporting {table.replace('_', ' ')}: {e}")
+        return None
+    finally:
+        cursor.close()
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
 
-def export_travel_expenses(cursor):
-    """Export travel expenses data"""
-    print("📋 Exporting travel expenses...")
+def lock_for_snapshot(connection):
+    """Block writers on connection so several snapshots can start at one point in time
+
+    Tries FLUSH TABLES WITH READ LOCK first and falls back to LOCK TABLES
+    ... READ, which needs no RELOAD privilege. Returns False if neither works.
+    """
+    cursor = connection.cursor()
     try:
-        cursor.execute("SELECT id, employee_name, date, start_reading, end_reading, distance, rate, amount FROM travel_expenses")
-        records = cursor.fetchall()
-        
-        data = []
-        for record in records:
-            data.append({
-                'id': record[0],
-                'employee_name': record[1],
-                'date': record[2].isoformat() if record[2] else None,
-                'start_reading': record[3],
-                'end_reading': record[4],
-                'distance': record[5],
-                'rate': record[6],
-                'amount': record[7]
-            })
-        
-        print(f"📊 Exported {len(data)} travel expense records")
-        return data
-    except Error as e:
-        print(f"❌ Error exporting travel expenses: {e}")
-        return []
+        try:
+            cursor.execute("FLUSH TABLES WITH READ LOCK")
+            return True
+        except Error:
+            pass
+        try:
+            cursor.execute("LOCK TABLES " + ", ".join(f"{table} READ" for table in TABLE_SPECS))
+            return True
+        except Error as e:
+            print(f"⚠️ Could not lock tables for the snapshot ({e}); snapshots may differ slightly")
+            return False
+    finally:
+        cursor.close()
+
+def open_snapshot_connections(lock_connection, count):
+    """Open count connections that all read from the same consistent snapshot
 
-def export_general_expenses(cursor):
-    """Export general expenses data"""
-    print("📋 Exporting general expenses...")
+    lock_connection holds the write lock while the snapshots start and is
+    not part of the returned pool.
+    """
+    connections = []
+    locked = lock_for_snapshot(lock_connection)
     try:
-        cursor.execute("SELECT id, employee_name, date, description, amount FROM general_expenses")
-        records = cursor.fetchall()
-        
-        data = []
-        for record in records:
-            data.append({
-                'id': record[0],
-                'employee_name': record[1],
-                'date': record[2].isoformat() if record[2] else None,
-                'description': record[3],
-                'amount': record[4]
-            })
-        
-        print(f"📊 Exported {len(data)} general expense records")
-        return data
-    except Error as e:
-        print(f"❌ Error exporting general expenses: {e}")
-        return []
+        for _ in range(count):
+            connection = create_mysql_connection()
+            if not connection:
+                break
+            connection.start_transaction(consistent_snapshot=True,
+                                         isolation_level='REPEATABLE READ',
+                                         readonly=True)
+            connections.append(connection)
+    finally:
+        if locked:
+            cursor = lock_connection.cursor()
+            cursor.execute("UNLOCK TABLES")
+            cursor.close()
+
+    if len(connections) < count:
+        for connection in connections:
+            connection.close()
+        return None
+    print(f"✅ Started {count} connections on one consistent snapshot")
+    return connections
 
-def export_advances(cursor):
-    """Export advances data"""
-    print("📋 Exporting advances...")
+def estimate_table_rows(connection):
+    """Return InnoDB's row estimate for each exported table"""
+    cursor = connection.cursor()
     try:
-        cursor.execute("SELECT id, employee_name, date, amount, notes FROM advances")
-        records = cursor.fetchall()
-        
-        data = []
-        for record in records:
-            data.append({
-                'id': record[0],
-                'employee_name': record[1],
-                'date': record[2].isoformat() if record[2] else None,
-                'amount': record[3],
-                'notes': record[4]
-            })
-        
-        print(f"📊 Exported {len(data)} advance records")
-        return data
-    except Error as e:
-        print(f"❌ Error exporting advances: {e}")
-        return []
+        cursor.execute("""
+            SELECT TABLE_NAME, TABLE_ROWS FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE()
+        """)
+        return {name: rows or 0 for name, rows in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+def part_filename(filename, number):
+    """attendance_export.ndjson.gz -> attendance_export.part0001.ndjson.gz"""
+    stem, suffix = filename.split('.', 1)
+    return f"{stem}.part{number:04d}.{suffix}"
+
+def manifest_filename(filename):
+    """attendance_export.json -> attendance_export.manifest.json"""
+    stem, _ = filename.split('.', 1)
+    return stem + '.manifest.json'
+
+def delta_filename(filename):
+    """attendance_export.json -> attendance_export.delta.json"""
+    stem, _ = filename.split('.', 1)
+    return stem + '.delta.json'
+
+def plan_id_ranges(connection, table, parts):
+    """Split a table's id space into up to parts contiguous (low, high) ranges
+
+    The first range has no lower bound and the last no upper bound, so rows
+    outside the MIN/MAX seen while planning still land in exactly one part.
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"SELECT MIN(id), MAX(id) FROM {table}")
+        low, high = cursor.fetchone()
+    finally:
+        cursor.close()
+    if low is None:
+        return [(None, None)]
+    
+    parts = max(1, min(parts, high - low + 1))
+    step = -(-(high - low + 1) // parts)
+    bounds = [low + step * i for i in range(1, parts)]
+    return list(zip([None] + bounds, [b - 1 for b in bounds] + [None]))
+
+def range_query(query, low, high, conditions=(), params=()):
+    """Restrict an export query to an id range and extra conditions, returning (query, params)"""
+    conditions, params = list(conditions), list(params)
+    if low is not None:
+        conditions.append("id >= %s")
+        params.append(low)
+    if high is not None:
+        conditions.append("id <= %s")
+        params.append(high)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"{query}{where} ORDER BY id", tuple(params)
+
+def load_watermarks(path):
+    """Read the per-table incremental export watermarks, {} on the first run"""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_watermarks(path, watermarks):
+    """Atomically replace the watermark state file"""
+    with open(path + '.tmp', 'w') as f:
+        json.dump(watermarks, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+def read_watermarks(connection):
+    """Return the current {'max_id', 'max_date'} of every incremental table
+
+    Read before the export starts, so rows committed during the export are
+    picked up again by the next run rather than skipped.
+    """
+    cursor = connection.cursor()
+    try:
+        watermarks = {}
+        for table in INCREMENTAL_TABLES:
+            cursor.execute(f"SELECT MAX(id), MAX(date) FROM {table}")
+            max_id, max_date = cursor.fetchone()
+            if max_id is not None:
+                watermarks[table] = {'max_id': max_id,
+                                     'max_date': max_date.isoformat() if max_date else None}
+        return watermarks
+    finally:
+        cursor.close()
+
+def incremental_conditions(watermark, rescan_days=DEFAULT_RESCAN_DAYS):
+    """Return (conditions, params) selecting rows past a watermark
+
+    Rows with a newer id are always exported; rows dated within rescan_days
+    of the watermark date are exported again to pick up late edits.
+    """
+    if not watermark:
+        return [], []
+    if not watermark.get('max_date'):
+        return ["id > %s"], [watermark['max_id']]
+    since = date.fromisoformat(watermark['max_date']) - timedelta(days=rescan_days)
+    return ["(id > %s OR date >= %s)"], [watermark['max_id'], since]
+
+def build_export_jobs(connection, split_tables=(), workers=1, rows_per_part=DEFAULT_ROWS_PER_PART,
+                      watermarks=None, rescan_days=DEFAULT_RESCAN_DAYS, fmt='json'):
+    """Return (table, query, params, convert, filename, estimated rows) for every file to write
+
+    Tables in split_tables are cut into id ranges, one numbered part file each,
+    with at least one part per worker so a single big table can use all of them.
+    With watermarks, incremental tables only export rows past their watermark.
+    """
+    estimates = estimate_table_rows(connection)
+    jobs = []
+    for table, spec in TABLE_SPECS.items():
+        query, convert = spec.select_sql, EXPORT_CONVERTERS[table]
+        filename = format_filename(spec.export_file, fmt)
+        estimate = estimates.get(table, 0)
+        conditions, params = incremental_conditions((watermarks or {}).get(table), rescan_days)
+        if table not in split_tables:
+            if conditions:
+                job_query, job_params = range_query(query, None, None, conditions, params)
+            else:
+                job_query, job_params = query, None
+            jobs.append((table, job_query, job_params, convert, filename, estimate))
+            continue
+        ranges = plan_id_ranges(connection, table, max(workers, -(-estimate // rows_per_part)))
+        for number, (low, high) in enumerate(ranges, 1):
+            part_query, part_params = range_query(query, low, high, conditions, params)
+            jobs.append((table, part_query, part_params, convert, part_filename(filename, number),
+                         estimate // len(ranges)))
+    return jobs
+
+def write_manifests(jobs, counts):
+    """Write <table>_export.manifest.json for each split table, remove stale ones otherwise"""
+    parts = {}
+    for (table, _, _, _, filename, _), count in zip(jobs, counts):
+        if '.part' in filename:
+            parts.setdefault(table, []).append({'file': filename, 'rows': count})
+    
+    for table, spec in TABLE_SPECS.items():
+        manifest = manifest_filename(spec.export_file)
+        if os.path.exists(manifest):
+            os.remove(manifest)
+        if table not in parts:
+            continue
+        if any(part['rows'] is None for part in parts[table]):
+            print(f"❌ Not writing {manifest}: some {table} parts failed to export")
+            continue
+        with open(manifest, 'w') as f:
+            json.dump({
+                'table': table,
+                'rows': sum(part['rows'] for part in parts[table]),
+                'parts': parts[table],
+            }, f, indent=2)
+        print(f"✅ Saved {manifest} ({len(parts[table])} parts)")
+
+def write_delta_markers(watermarks=None):
+    """Write <table>_export.delta.json for each table exported past a watermark, remove it otherwise
+
+    A delta export only holds the rows changed since its watermark, so the
+    importer must not treat the months in it as complete.
+    """
+    for table, spec in TABLE_SPECS.items():
+        marker = delta_filename(spec.export_file)
+        if os.path.exists(marker):
+            os.remove(marker)
+        watermark = (watermarks or {}).get(table)
+        if not watermark:
+            continue
+        with open(marker, 'w') as f:
+            json.dump({'table': table, 'since': watermark}, f, indent=2)
+        print(f"✅ Saved {marker} (incremental export)")
+
+def run_export_jobs(connection, jobs, workers=1, chunk_size=DEFAULT_CHUNK_SIZE, metrics=None):
+    """Stream every job's file, concurrently over snapshot connections when workers > 1
+
+    Jobs are started largest first, so wall time approaches the time of the
+    biggest job instead of the sum of all of them. Returns the row counts.
+    """
+    if workers <= 1:
+        return [stream_export(connection, table, query, convert, filename, chunk_size, params, metrics)
+                for table, query, params, convert, filename, _ in jobs]
+    
+    snapshots = open_snapshot_connections(connection, min(workers, len(jobs)))
+    if not snapshots:
+        raise ConnectionError("Could not open the snapshot connections")
+    
+    idle = queue.Queue()
+    for snapshot in snapshots:
+        idle.put(snapshot)
+    
+    def run(table, query, params, convert, filename, _):
+        snapshot = idle.get()
+        try:
+            return stream_export(snapshot, table, query, convert, filename, chunk_size, params, metrics)
+        finally:
+            idle.put(snapshot)
+    
+    try:
+        order = sorted(range(len(jobs)), key=lambda i: jobs[i][5], reverse=True)
+        with ThreadPoolExecutor(max_workers=len(snapshots)) as executor:
+            futures = {i: executor.submit(run, *jobs[i]) for i in order}
+            return [futures[i].result() for i in range(len(jobs))]
+    finally:
+        for snapshot in snapshots:
+            snapshot.rollback()
+            snapshot.close()
+
+def export_in_memory(connection, metrics):
+    """Fetch every table fully, then save each one with json.dump
+
+    Returns the tables that failed to export; their files are not written.
+    """
+    cursor = connection.cursor()
+    try:
+        exported = []
+        for spec in TABLE_SPECS.values():
+            stats = metrics.start(spec.name)
+            with stats.stage('read'):
+                data = export_table(cursor, spec)
+            exported.append((spec.export_file, data, stats))
+    finally:
+        cursor.close()
+    
+    print("\n💾 Saving to JSON files...")
+    failed = set()
+    for filename, data, stats in exported:
+        if data is None:
+            failed.add(stats.name)
+            continue
+        with stats.stage('write'):
+            with open(filename, 'w') as f:
+                json.dump(data, f, indent=2)
+        stats.finish(len(data), nbytes=os.path.getsize(filename))
+        print(f"✅ Saved {filename}")
+    return failed
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export PythonAnywhere MySQL tables to JSON files")
+    parser.add_argument('--mode', choices=['stream', 'memory'], default='stream',
+                        help="stream: unbuffered cursor, fetchmany chunks written straight to disk (default); "
+                             "memory: fetchall every table, then json.dump")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="rows per fetchmany call in stream mode")
+    parser.add_argument('--format', choices=list(FORMAT_SUFFIXES), default='json',
+                        help="json: indented JSON array (default); ndjson: gzip-compressed JSON lines; "
+                             "columnar: gzip-compressed typed column blocks (stream mode)")
+    parser.add_argument('--parallel', type=int, default=1,
+                        help="export tables concurrently over this many connections "
+                             "sharing one consistent snapshot (stream mode)")
+    parser.add_argument('--split', action='append', default=[], metavar='TABLE',
+                        help="export TABLE as id-range part files plus a manifest (stream mode, repeatable)")
+    parser.add_argument('--rows-per-part', type=int, default=DEFAULT_ROWS_PER_PART,
+                        help="target rows per part file for --split tables")
+    parser.add_argument('--incremental', action='store_true',
+                        help="only export rows past the watermarks in --state-file (stream mode)")
+    parser.add_argument('--state-file', default=DEFAULT_STATE_FILE,
+                        help="where incremental export watermarks are kept")
+    parser.add_argument('--rescan-days', type=int, default=DEFAULT_RESCAN_DAYS,
+                        help="re-export rows dated this many days before the watermark to catch late edits")
+    parser.add_argument('--metrics-file', default=DEFAULT_METRICS_FILE,
+                        help="where to write the JSON report of rows, bytes, stage times and throughput")
+    parser.add_argument('--progress-interval', type=float, default=DEFAULT_PROGRESS_INTERVAL,
+                        help="seconds between progress lines while a table exports")
+    args = parser.parse_args()
+    if args.mode == 'memory' and args.format != 'json':
+        parser.error("--format ndjson/columnar needs --mode stream")
+    if args.mode == 'memory' and args.incremental:
+        parser.error("--incremental needs --mode stream; --mode memory always exports every row")
+    return args
 
 def main():
+    args = parse_args()
     print("🚀 Corrected data export from PythonAnywhere MySQL to JSON files")
     print("=" * 70)
     
@@ -165,41 +431,36 @@ def main():
     connection = create_mysql_connection()
     if not connection:
         print("❌ Cannot proceed without MySQL connection")
-        return
-    
-    cursor = connection.cursor()
+        sys.exit(1)
     
+    metrics = RunMetrics('export', args.progress_interval)
+    status = 'failed'
     try:
-        # Export all tables
-        employees = export_employees(cursor)
-        attendance = export_attendance(cursor)
-        travel_expenses = export_travel_expenses(cursor)
-        general_expenses = export_general_expenses(cursor)
-        advances = export_advances(cursor)
-        
-        # Save to JSON files
-        print("\n💾 Saving to JSON files...")
-        
-        with open('employees_export.json', 'w') as f:
-            json.dump(employees, f, indent=2)
-        print("✅ Saved employees_export.json")
-        
-        with open('attendance_export.json', 'w') as f:
-            json.dump(attendance, f, indent=2)
-        print("✅ Saved attendance_export.json")
-        
-        with open('travel_expenses_export.json', 'w') as f:
-            json.dump(travel_expenses, f, indent=2)
-        print("✅ Saved travel_expenses_export.json")
-        
-        with open('general_expenses_export.json', 'w') as f:
-            json.dump(general_expenses, f, indent=2)
-        print("✅ Saved general_expenses_export.json")
-        
-        with open('advances_export.json', 'w') as f:
-            json.dump(advances, f, indent=2)
-        print("✅ Saved advances_export.json")
+        if args.mode == 'stream':
+            previous = load_watermarks(args.state_file) if args.incremental else None
+            current = read_watermarks(connection)
+            jobs = build_export_jobs(connection, args.split, args.parallel, args.rows_per_part,
+                                     previous, args.rescan_days, args.format)
+            counts = run_export_jobs(connection, jobs, args.parallel, args.chunk_size, metrics)
+            write_manifests(jobs, counts)
+            write_delta_markers(previous)
+            
+            # Only advance the watermark of tables whose every file was written
+            failed = {job[0] for job, count in zip(jobs, counts) if count is None}
+            watermarks = load_watermarks(args.state_file)
+            watermarks.update({table: mark for table, mark in current.items() if table not in failed})
+            save_watermarks(args.state_file, watermarks)
+            print(f"✅ Saved export watermarks to {args.state_file}")
+        else:
+            failed = export_in_memory(connection, metrics)
+            write_manifests([], [])
+            write_delta_markers()
         
+        if failed:
+            print(f"\n❌ Data export failed for {', '.join(sorted(failed))}; "
+                  f"any previous export files of these tables are stale")
+            return
+        status = 'ok'
         print("\n🎉 Data export completed successfully!")
         print("📁 JSON files created:")
         print("  - employees_export.json")
@@ -219,9 +480,13 @@ def main():
         print(f"Traceback: {traceback.format_exc()}")
     finally:
         if connection.is_connected():
-            cursor.close()
             connection.close()
             print("✅ Database connection closed")
+        report = metrics.write(args.metrics_file, status)
+        print(f"📊 {report['rows']} rows, {report['bytes']} bytes in {report['elapsed']:.1f}s "
+              f"({report['rows_per_second']} rows/s); metrics saved to {args.metrics_file}")
+        if status != 'ok':
+            sys.exit(1)
 
 if __name__ == "__main__":
     main()
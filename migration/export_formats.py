@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Record conversion and file formats of the MySQL exports
+Formats fetched rows into export records and writes them as a JSON
+array, NDJSON or columnar blocks. Needs no database driver, so the
+benchmarks and synthetic exports can use it without mysql-connector.
+"""
+
+import gzip
+import json
+from table_specs import TABLE_SPECS
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# File suffix for each --format
+FORMAT_SUFFIXES = {'json': '.json', 'ndjson': '.ndjson.gz', 'columnar': '.columnar.gz'}
+
+# Columnar encoding per column: repeated values get a per-block dictionary,
+# shift times are stored as seconds since midnight, everything else as is
+DICTIONARY_COLUMNS = {'employee_name', 'date'}
+SECONDS_COLUMNS = {column for spec in TABLE_SPECS.values() for column in spec.columns_of_type('time')}
+
+
+def format_seconds(total_seconds):
+    """Format a MySQL TIME given in whole seconds as [-]HH:MM:SS"""
+    sign = '-' if total_seconds < 0 else ''
+    total_seconds = abs(total_seconds)
+    return f"{sign}{total_seconds // 3600:02d}:{total_seconds % 3600 // 60:02d}:{total_seconds % 60:02d}"
+
+
+def format_time_column(values):
+    """Format a whole column of MySQL TIME values, formatting each distinct value once
+
+    Shift times repeat across thousands of rows, so a chunk only pays for
+    its distinct values; NULL stays None and timedelta(0) is '00:00:00'.
+    """
+    labels = {None: None}
+    formatted = []
+    for value in values:
+        label = labels.get(value)
+        if label is None and value is not None:
+            label = labels[value] = format_seconds(value.days * 86400 + value.seconds)
+        formatted.append(label)
+    return formatted
+
+
+def format_date_column(values):
+    """Format a whole column of dates as ISO strings, each distinct date once"""
+    labels = {None: None}
+    formatted = []
+    for value in values:
+        label = labels.get(value)
+        if label is None and value is not None:
+            label = labels[value] = value.isoformat()
+        formatted.append(label)
+    return formatted
+
+
+# Column formatters by spec column type; other columns are exported as fetched
+COLUMN_FORMATTERS = {'date': format_date_column, 'time': format_time_column}
+
+
+def compile_export_converter(spec):
+    """Build a chunk converter that formats a table's fetched rows column by column"""
+    formatters = tuple(COLUMN_FORMATTERS.get(spec.types[column]) for column in spec.columns)
+    keys = spec.columns
+
+    def convert(records):
+        if not records:
+            return []
+        columns = [format_column(values) if format_column else values
+                   for format_column, values in zip(formatters, zip(*records))]
+        return [dict(zip(keys, values)) for values in zip(*columns)]
+    return convert
+
+
+# table -> chunk converter, compiled once from the table specs
+EXPORT_CONVERTERS = {name: compile_export_converter(spec) for name, spec in TABLE_SPECS.items()}
+
+
+class JsonArrayWriter:
+    """Write records as a JSON array, byte-for-byte like json.dump(records, f, indent=2)"""
+
+    def __init__(self, f):
+        self.f = f
+        self.count = 0
+
+    def write(self, record):
+        self.f.write(',\n  ' if self.count else '[\n  ')
+        self.f.write(json.dumps(record, indent=2).replace('\n', '\n  '))
+        self.count += 1
+
+    def close(self):
+        self.f.write('\n]' if self.count else '[]')
+
+
+class NdjsonWriter:
+    """Write one compact JSON record per line"""
+
+    def __init__(self, f):
+        self.f = f
+        self.count = 0
+
+    def write(self, record):
+        self.f.write(json.dumps(record, separators=(',', ':')))
+        self.f.write('\n')
+        self.count += 1
+
+    def close(self):
+        pass
+
+
+def time_to_seconds(value):
+    """'[-]HH:MM:SS' -> seconds since midnight, negative for a negative MySQL TIME"""
+    if value is None:
+        return None
+    sign = -1 if value.startswith('-') else 1
+    hours, minutes, seconds = value.lstrip('-').split(':')
+    return sign * (int(hours) * 3600 + int(minutes) * 60 + int(seconds))
+
+
+class ColumnarWriter:
+    """Write records as blocks of typed columns, one JSON document per line
+
+    The first line is a header naming the table, its columns and their
+    encodings; every following line holds up to block_size rows.
+    """
+
+    def __init__(self, f, table, block_size=DEFAULT_CHUNK_SIZE):
+        self.f = f
+        self.table = table
+        self.block_size = block_size
+        self.columns = None
+        self.block = []
+        self.count = 0
+
+    def _encoding(self, column):
+        if column in DICTIONARY_COLUMNS:
+            return 'dictionary'
+        if column in SECONDS_COLUMNS:
+            return 'seconds'
+        return 'plain'
+
+    def _write_header(self, columns):
+        self.columns = columns
+        self.f.write(json.dumps({
+            'format': 'columnar',
+            'version': 1,
+            'table': self.table,
+            'columns': [[column, self._encoding(column)] for column in columns],
+        }, separators=(',', ':')))
+        self.f.write('\n')
+
+    def _flush(self):
+        encoded = {}
+        for column in self.columns:
+            values = [record[column] for record in self.block]
+            encoding = self._encoding(column)
+            if encoding == 'dictionary':
+                codes = {}
+                encoded[column] = {
+                    'codes': [codes.setdefault(value, len(codes)) for value in values],
+                    'dictionary': list(codes),
+                }
+            elif encoding == 'seconds':
+                encoded[column] = [time_to_seconds(value) for value in values]
+            else:
+                encoded[column] = values
+        self.f.write(json.dumps({'rows': len(self.block), 'columns': encoded}, separators=(',', ':')))
+        self.f.write('\n')
+        self.block = []
+
+    def write(self, record):
+        if self.columns is None:
+            self._write_header(list(record))
+        self.block.append(record)
+        self.count += 1
+        if len(self.block) >= self.block_size:
+            self._flush()
+
+    def close(self):
+        if self.columns is None:
+            self._write_header([])
+        if self.block:
+            self._flush()
+
+
+def export_format(filename):
+    """Return the --format a filename was written in"""
+    for fmt, suffix in FORMAT_SUFFIXES.items():
+        if fmt != 'json' and filename.endswith(suffix):
+            return fmt
+    return 'json'
+
+
+def open_writer(path, fmt, table, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Open path for writing and return (file, writer) for the given format"""
+    if fmt == 'json':
+        f = open(path, 'w')
+        return f, JsonArrayWriter(f)
+    f = gzip.open(path, 'wt', compresslevel=6)
+    if fmt == 'ndjson':
+        return f, NdjsonWriter(f)
+    return f, ColumnarWriter(f, table, chunk_size)
+
+
+def format_filename(filename, fmt):
+    """attendance_export.json -> attendance_export.ndjson.gz for --format ndjson"""
+    stem, _ = filename.split('.', 1)
+    return stem + FORMAT_SUFFIXES[fmt]
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Streaming reader for the *_export.json files
+Yields records one at a time from the top-level JSON array, so memory stays
+flat regardless of file size and loading can start with the first record.
+Tables exported with --split are read part by part through their manifest,
+and the gzip-compressed ndjson and columnar formats are detected by content.
+"""
+
+import codecs
+import gzip
+import json
+import os
+from collections import deque
+from itertools import islice
+from export_formats import format_seconds
+
+CHUNK_SIZE = 64 * 1024
+
+# Suffixes written by export_data_corrected.py --format
+FORMAT_SUFFIXES = ('.json', '.ndjson.gz', '.columnar.gz')
+
+
+def open_binary(path):
+    """Open an export file for binary reading, decompressing it if it is gzipped"""
+    with open(path, 'rb') as f:
+        magic = f.read(2)
+    return gzip.open(path, 'rb') if magic == b'\x1f\x8b' else open(path, 'rb')
+
+
+class JsonArrayReader:
+    """Iterate over the elements of a top-level JSON array in a file
+
+    After each record, `offset` is the byte position just past it and
+    `count` the number of records read, so a later reader created with
+    that offset carries on with the next record.
+    """
+
+    def __init__(self, path, offset=0, chunk_size=CHUNK_SIZE):
+        self.path = path
+        self.offset = offset
+        self.chunk_size = chunk_size
+        self.count = 0
+
+    def __iter__(self):
+        decoder = json.JSONDecoder()
+        utf8 = codecs.getincrementaldecoder('utf-8')()
+        # 'start': expect '['; 'first': value or ']'; 'next': ',' or ']'; 'value': value
+        state = 'next' if self.offset else 'start'
+
+        with open_binary(self.path) as f:
+            f.seek(self.offset)
+            buffer = ''
+            is_ascii = True
+            pos = 0
+            position = self.offset  # byte offset of buffer[pos]
+            eof = False
+
+            def fill():
+                nonlocal buffer, is_ascii, pos, eof
+                raw = f.read(self.chunk_size)
+                eof = not raw
+                buffer = buffer[pos:] + utf8.decode(raw, final=eof)
+                is_ascii = buffer.isascii()
+                pos = 0
+
+            def skip_to(new_pos):
+                nonlocal pos, position
+                position += (new_pos - pos) if is_ascii else len(buffer[pos:new_pos].encode('utf-8'))
+                pos = new_pos
+
+            while True:
+                while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                    skip_to(pos + 1)
+                if pos >= len(buffer):
+                    if eof:
+                        if state == 'start':
+                            return  # empty file, treat as an empty export
+                        raise ValueError(f"{self.path}: unexpected end of JSON array")
+                    fill()
+                    continue
+
+                char = buffer[pos]
+                if state == 'start':
+                    if char != '[':
+                        raise ValueError(f"{self.path}: expected a top-level JSON array")
+                    skip_to(pos + 1)
+                    state = 'first'
+                elif state in ('first', 'next') and char == ']':
+                    return
+                elif state == 'next':
+                    if char != ',':
+                        raise ValueError(f"{self.path}: expected ',' at byte {position}")
+                    skip_to(pos + 1)
+                    state = 'value'
+                else:
+                    try:
+                        record, end = decoder.raw_decode(buffer, pos)
+                    except json.JSONDecodeError:
+                        if eof:
+                            raise
+                        fill()
+                        continue
+                    if end == len(buffer) and not eof:
+                        # A scalar may continue in the next chunk
+                        fill()
+                        continue
+                    skip_to(end)
+                    state = 'next'
+                    self.offset = position
+                    self.count += 1
+                    yield record
+
+
+class NdjsonReader:
+    """Iterate over a file holding one JSON record per line"""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+
+    def __iter__(self):
+        with open_binary(self.path) as f:
+            for line in f:
+                if line.strip():
+                    self.count += 1
+                    yield json.loads(line)
+
+
+class ColumnarReader:
+    """Iterate over the records of a columnar export, one column block at a time"""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+
+    def __iter__(self):
+        with open_binary(self.path) as f:
+            header = json.loads(f.readline())
+            columns = header['columns']
+            for line in f:
+                if not line.strip():
+                    continue
+                block = json.loads(line)
+                decoded = []
+                for column, encoding in columns:
+                    values = block['columns'][column]
+                    if encoding == 'dictionary':
+                        dictionary = values['dictionary']
+                        values = [dictionary[code] for code in values['codes']]
+                    elif encoding == 'seconds':
+                        values = [None if value is None else format_seconds(value) for value in values]
+                    decoded.append(values)
+                names = [column for column, _ in columns]
+                for values in zip(*decoded):
+                    self.count += 1
+                    yield dict(zip(names, values))
+
+
+def detect_format(path):
+    """Return 'json', 'ndjson' or 'columnar' by looking at the start of the file"""
+    with open_binary(path) as f:
+        first_line = f.readline().lstrip()
+    if not first_line or first_line.startswith(b'['):
+        return 'json'
+    try:
+        header = json.loads(first_line)
+    except ValueError:
+        return 'ndjson'
+    if isinstance(header, dict) and header.get('format') == 'columnar':
+        return 'columnar'
+    return 'ndjson'
+
+
+def read_export_file(path):
+    """Return a record reader for a single export file in any format"""
+    fmt = detect_format(path)
+    if fmt == 'columnar':
+        return ColumnarReader(path)
+    if fmt == 'ndjson':
+        return NdjsonReader(path)
+    return JsonArrayReader(path)
+
+
+def manifest_path(path):
+    """attendance_export.json -> attendance_export.manifest.json"""
+    stem, _ = path.rsplit('_export', 1)
+    return stem + '_export.manifest.json'
+
+
+def delta_path(path):
+    """attendance_export.json -> attendance_export.delta.json"""
+    stem, _ = path.rsplit('_export', 1)
+    return stem + '_export.delta.json'
+
+
+def is_delta_export(path):
+    """Whether the exporter marked a table's export as an --incremental delta"""
+    return os.path.exists(delta_path(path))
+
+
+class ManifestReader:
+    """Iterate over the records of every part file listed in a split-export manifest"""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        with open(path) as f:
+            self.manifest = json.load(f)
+        directory = os.path.dirname(path)
+        self.parts = [os.path.join(directory, part['file']) for part in self.manifest['parts']]
+
+    def __iter__(self):
+        for part in self.parts:
+            for record in read_export_file(part):
+                self.count += 1
+                yield record
+
+
+def export_size(reader):
+    """Bytes on disk behind a reader returned by open_export"""
+    return sum(os.path.getsize(part) for part in getattr(reader, 'parts', None) or [reader.path])
+
+
+def open_export(path):
+    """Return a record reader for a table's export in whatever form was written last
+
+    path is the default attendance_export.json name; the split manifest and
+    the ndjson and columnar variants next to it are considered too, and the
+    most recently written one wins.
+    """
+    stem, _ = path.rsplit('_export', 1)
+    candidates = [manifest_path(path)] + [stem + '_export' + suffix for suffix in FORMAT_SUFFIXES]
+    existing = [candidate for candidate in candidates if os.path.exists(candidate)]
+    if not existing:
+        raise FileNotFoundError(f"No export found for {path}")
+    latest = max(existing, key=os.path.getmtime)
+    if latest == manifest_path(path):
+        return ManifestReader(latest)
+    return read_export_file(latest)
+
+
+def export_position(reader):
+    """Where a reader returned by open_export stands, for resume_export"""
+    return {'offset': getattr(reader, 'offset', None), 'count': reader.count}
+
+
+def resume_export(path, position):
+    """Reopen a table's export just past position; returns (reader, record iterator)
+
+    A JSON array export is reopened at the saved byte offset; the other
+    formats read and discard the records already loaded.
+    """
+    reader = open_export(path)
+    if isinstance(reader, JsonArrayReader) and position.get('offset'):
+        reader = JsonArrayReader(reader.path, position['offset'])
+        reader.count = position['count']
+        return reader, iter(reader)
+    records = iter(reader)
+    deque(islice(records, position['count']), maxlen=0)
+    return reader, records
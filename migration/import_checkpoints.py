@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Chunk checkpoints for resumable imports
+The importer commits a chunk of rows at a time and, after each commit,
+records per table how many chunks are in, the last id loaded and how far
+into the export file they reach. After a crash or a dropped connection,
+--resume reopens each export just past the last committed chunk, so at
+most one chunk of work is done again.
+"""
+
+import hashlib
+import json
+import os
+from datetime import date
+from itertools import chain, islice
+from psycopg2.extensions import TRANSACTION_STATUS_INERROR
+from export_reader import export_position, open_export, resume_export
+
+DEFAULT_CHECKPOINT_FILE = 'import_checkpoint.json'
+DEFAULT_CHUNK_ROWS = 50000
+
+# Bytes at the start of each export file hashed into its fingerprint
+FINGERPRINT_BYTES = 1 << 20
+
+
+def export_fingerprint(reader):
+    """Hash of the name, size and first megabyte of every file behind a reader"""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in getattr(reader, 'parts', None) or [reader.path]:
+        digest.update(f"{os.path.basename(path)}:{os.path.getsize(path)}:".encode('utf-8'))
+        with open(path, 'rb') as f:
+            digest.update(f.read(FINGERPRINT_BYTES))
+    return digest.hexdigest()
+
+
+class ImportCheckpoint:
+    """Per-table progress of a chunked import, saved after every commit"""
+
+    def __init__(self, path=DEFAULT_CHECKPOINT_FILE, chunk_rows=DEFAULT_CHUNK_ROWS, resume=False):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.tables = {}
+        if resume and os.path.exists(path):
+            with open(path) as f:
+                self.tables = json.load(f)['tables']
+
+    def done(self, table):
+        return self.tables.get(table, {}).get('status') == 'done'
+
+    def entry(self, table):
+        return self.tables.get(table)
+
+    def open(self, table, export_file):
+        """(reader, records) of a table's export, past the chunks already committed
+
+        A table part-way through must still have the export it was started
+        from; if the file changed, resuming would skip the wrong records.
+        """
+        entry = self.tables.get(table)
+        if entry and entry['status'] == 'loading':
+            reader, records = resume_export(export_file, entry['position'])
+            if reader.path != entry['file'] or export_fingerprint(reader) != entry['fingerprint']:
+                raise ValueError(f"{reader.path} is not the export {self.path} was saved for; "
+                                 f"run again without --resume")
+            return reader, records
+        reader = open_export(export_file)
+        self.tables[table] = {
+            'status': 'loading',
+            'file': reader.path,
+            'fingerprint': export_fingerprint(reader),
+            'chunks': 0,
+            'last_id': None,
+            'position': export_position(reader),
+            'truncated': [],
+        }
+        return reader, iter(reader)
+
+    def truncated(self, table):
+        """Months whose partitions this table's load already truncated and committed"""
+        return [date.fromisoformat(month) for month in self.tables[table]['truncated']]
+
+    def chunks(self, cursor, table, reader, items, key, partitions=None):
+        """Yield items in chunks of chunk_rows, committing each one once it is loaded
+
+        The caller must load a chunk completely before asking for the next;
+        the commit, then the saved position of reader, happen in between.
+        key(item) is the id recorded as the last one loaded. A chunk whose
+        transaction an error aborted is not committed (psycopg2 would
+        quietly roll it back) and the checkpoint stays where it was.
+        """
+        iterator = iter(items)
+        last = None
+
+        def chunk(first):
+            nonlocal last
+            for item in chain((first,), islice(iterator, self.chunk_rows - 1)):
+                last = item
+                yield item
+
+        for first in iterator:
+            yield chunk(first)
+            if cursor.connection.get_transaction_status() == TRANSACTION_STATUS_INERROR:
+                raise RuntimeError(f"{table} chunk {self.tables[table]['chunks'] + 1} hit an error "
+                                   f"that aborted its transaction; it was not committed")
+            cursor.connection.commit()
+            self.advance(table, export_position(reader), key(last), partitions)
+        self.finish(table)
+
+    def advance(self, table, position, last_id, partitions=None):
+        """Record a committed chunk of table ending at position (from export_position)"""
+        entry = self.tables[table]
+        entry['chunks'] += 1
+        entry['last_id'] = last_id
+        entry['position'] = position
+        if partitions:
+            entry['truncated'] = [month.isoformat() for month in partitions.truncated]
+        self.save()
+
+    def finish(self, table):
+        self.tables[table]['status'] = 'done'
+        self.save()
+
+    def save(self):
+        """Durably and atomically replace the state file"""
+        with open(self.path + '.tmp', 'w') as f:
+            json.dump({'chunk_rows': self.chunk_rows, 'tables': self.tables}, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self.path + '.tmp', self.path)
+
+    def clear(self):
+        """Remove the state file once the whole import has committed"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -4,216 +4,463 @@ Import data from JSON files to Supabase PostgreSQL
 This script imports data exported from PythonAnywhere
 """
 
-import json
+import argparse
+import asyncio
+import importlib.util
+import logging
+import os
+import re
+import sys
+from contextlib import redirect_stderr, redirect_stdout
+from operator import itemgetter
 import psycopg2
-from psycopg2 import sql
-from datetime import datetime, date, time
+from async_pipeline import (DEFAULT_QUEUE_DEPTH, DEFAULT_WRITERS, BatchStatements, close_writers,
+                            load_pipelined, open_writers)
+from attendance_partitions import PARTITIONED_LOADER, PARTITIONED_TABLE, MonthlyPartitions, is_partitioned
+from batch_loader import DEFAULT_BATCH_SIZE, RejectLog
+from db_connection import ConnectionPool, retry_transient
+from export_reader import delta_path, export_size, is_delta_export, open_export
+from import_checkpoints import DEFAULT_CHECKPOINT_FILE, DEFAULT_CHUNK_ROWS, ImportCheckpoint
+from import_scheduler import run_import
+from pipeline_metrics import DEFAULT_PROGRESS_INTERVAL, RunMetrics, configure_logging
+from row_hashes import DEFAULT_MANIFEST_FILE, HashManifest
+from setup_supabase_tables import drop_indexes, finish_bulk_load
+from table_loader import LOADERS, convert_records
+from table_specs import TABLE_SPECS
 
-def create_supabase_connection():
-    """Create connection to Supabase database"""
-    try:
-        connection = psycopg2.connect(
-            host='db.sevlfbqydeludjfzatfe.supabase.co',
-            database='postgres',
-            user='postgres',
-            password='puravbhatt0504',
-            port='5432',
-            sslmode='require'
-        )
-        
-        if connection:
-            print("Connected to Supabase database")
-            return connection
-        else:
-            print("Failed to connect to Supabase")
-            return None
-            
-    except Exception as e:
-        print(f"Supabase connection error: {e}")
-        return None
+DEFAULT_METRICS_FILE = 'import_metrics.json'
 
-def parse_datetime(value):
-    """Parse datetime string back to datetime object"""
-    if not value:
-        return None
-    try:
-        if 'T' in value:
-            return datetime.fromisoformat(value.replace('Z', '+00:00'))
-        elif len(value) == 10:  # Date only
-            return datetime.strptime(value, '%Y-%m-%d').date()
-        elif len(value) == 8:  # Time only
-            return datetime.strptime(value, '%H:%M:%S').time()
-    except:
-        return None
-    return None
-
-def import_employees(cursor, data):
-    """Import employees data"""
-    print(f"📋 Importing {len(data)} employees...")
-    
-    for record in data:
-        try:
-            cursor.execute("""
-                INSERT INTO employees (id, name) 
-                VALUES (%s, %s) 
-                ON CONFLICT (id) DO UPDATE SET name = EXCLUDED.name
-            """, (record['id'], record['name']))
-            print(f"✅ Imported employee: {record['name']} (ID: {record['id']})")
-        except Exception as e:
-            print(f"❌ Error importing employee {record['name']}: {e}")
+# Emoji (with a following variation selector and space) dropped by --plain
+EMOJI = re.compile(r'[\u2190-\u2bff\U0001F000-\U0001FFFF]\ufe0f? ?')
 
-def import_attendance(cursor, data):
-    """Import attendance data"""
-    print(f"📋 Importing {len(data)} attendance records...")
-    
-    for record in data:
-        try:
-            # Parse datetime fields
-            date_val = parse_datetime(record['date'])
-            shift1_in = parse_datetime(record['shift1_in'])
-            shift1_out = parse_datetime(record['shift1_out'])
-            shift2_in = parse_datetime(record['shift2_in'])
-            shift2_out = parse_datetime(record['shift2_out'])
-            
-            cursor.execute("""
-                INSERT INTO attendance (id, employee_name, date, shift1_in, shift1_out, shift2_in, shift2_out) 
-                VALUES (%s, %s, %s, %s, %s, %s, %s) 
-                ON CONFLICT (id) DO UPDATE SET
-                    employee_name = EXCLUDED.employee_name,
-                    date = EXCLUDED.date,
-                    shift1_in = EXCLUDED.shift1_in,
-                    shift1_out = EXCLUDED.shift1_out,
-                    shift2_in = EXCLUDED.shift2_in,
-                    shift2_out = EXCLUDED.shift2_out
-            """, (record['id'], record['employee_name'], 
-                  date_val, shift1_in, shift1_out, shift2_in, shift2_out))
-            print(f"✅ Imported attendance: {record['employee_name']} - {record['date']}")
-        except Exception as e:
-            print(f"❌ Error importing attendance {record['employee_name']}: {e}")
+# Rows per writer batch in pipeline mode, where each batch costs a few round trips
+DEFAULT_PIPELINE_BATCH_SIZE = 5000
+
+log = logging.getLogger(__name__)
 
-def import_travel_expenses(cursor, data):
-    """Import travel expenses data"""
-    print(f"📋 Importing {len(data)} travel expense records...")
+def import_rows(cursor, loader, data, stats, partitions=None):
+    """Import a table with one INSERT ... ON CONFLICT per record; returns (imported, failed)
+
+    Each record is written under its own savepoint, so a row the database
+    rejects is rolled back alone instead of aborting the whole transaction.
+    """
+    spec = loader.spec
+    print(f"📋 Importing {spec.label}...")
+    statement = loader.row_upsert.as_string(cursor)
+    date_position = spec.columns.index('date') if partitions else None
+    debug = log.isEnabledFor(logging.DEBUG)
     
-    for record in data:
+    imported = failed = 0
+    for record in stats.progress(stats.timed('read', data)):
         try:
-            date_val = parse_datetime(record['date'])
-            cursor.execute("""
-                INSERT INTO travel_expenses (id, employee_name, date, start_reading, end_reading, distance, rate, amount) 
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s) 
-                ON CONFLICT (id) DO UPDATE SET
-                    employee_name = EXCLUDED.employee_name,
-                    date = EXCLUDED.date,
-                    start_reading = EXCLUDED.start_reading,
-                    end_reading = EXCLUDED.end_reading,
-                    distance = EXCLUDED.distance,
-                    rate = EXCLUDED.rate,
-                    amount = EXCLUDED.amount
-            """, (record['id'], record['employee_name'], 
-                  date_val, record['start_reading'], record['end_reading'], 
-                  record['distance'], record['rate'], record['amount']))
-            print(f"✅ Imported travel expense: {record['employee_name']} - {record['date']}")
+            with stats.stage('parse'):
+                row = loader.convert(record)
+            with stats.stage('write'):
+                if partitions:
+                    partitions.ensure_day(row[date_position])
+                cursor.execute("SAVEPOINT import_row")
+                try:
+                    loader.delete_moved(cursor, [row])
+                    cursor.execute(statement, row)
+                except psycopg2.Error:
+                    cursor.execute("ROLLBACK TO SAVEPOINT import_row")
+                    raise
+                cursor.execute("RELEASE SAVEPOINT import_row")
+            imported += 1
+            if debug:
+                log.debug(f"✅ Imported {spec.singular}: {spec.describe.format(**record)}")
         except Exception as e:
-            print(f"❌ Error importing travel expense {record['employee_name']}: {e}")
+            failed += 1
+            print(f"❌ Error importing {spec.singular} {spec.describe.format(**record)}: {e}")
+    print(f"✅ Imported {imported} {spec.label}")
+    return imported, failed
+
+def bulk_import(cursor, loader, rows, before_merge=None):
+    """Import a table with COPY into a staging table and one set-based upsert"""
+    table = loader.spec.name
+    print(f"📋 Bulk loading {table} records...")
+    copied, merged = loader.copy(cursor, rows, before_merge)
+    print(f"✅ Copied {copied} rows, merged {merged} into {table}")
+    return copied
 
-def import_general_expenses(cursor, data):
-    """Import general expenses data"""
-    print(f"📋 Importing {len(data)} general expense records...")
+def batch_import(cursor, loader, rows, batch_size, rejects, manifest=None):
+    """Import a table with multi-row upserts, quarantining only the bad rows"""
+    table = loader.spec.name
+    print(f"📋 Loading {table} records in batches of {batch_size}...")
     
-    for record in data:
-        try:
-            date_val = parse_datetime(record['date'])
-            cursor.execute("""
-                INSERT INTO general_expenses (id, employee_name, date, description, amount) 
-                VALUES (%s, %s, %s, %s, %s) 
-                ON CONFLICT (id) DO UPDATE SET
-                    employee_name = EXCLUDED.employee_name,
-                    date = EXCLUDED.date,
-                    description = EXCLUDED.description,
-                    amount = EXCLUDED.amount
-            """, (record['id'], record['employee_name'], 
-                  date_val, record['description'], record['amount']))
-            print(f"✅ Imported general expense: {record['employee_name']} - {record['date']}")
-        except Exception as e:
-            print(f"❌ Error importing general expense {record['employee_name']}: {e}")
+    def reject(row, error):
+        rejects.add(row, error)
+        if manifest:
+            manifest.forget(table, row[0])
+    
+    loaded = loader.batch(cursor, rows, batch_size, on_reject=reject)
+    print(f"✅ Loaded {loaded} rows into {table}")
+    return loaded
+
+def open_table_export(table, checkpoint=None, partitions=None):
+    """(reader, records, resumed) of a table's export, past the chunks a checkpoint has committed"""
+    if not checkpoint:
+        data = open_export(TABLE_SPECS[table].export_file)
+        return data, data, False
+    data, records = checkpoint.open(table, TABLE_SPECS[table].export_file)
+    entry = checkpoint.entry(table)
+    if entry['chunks']:
+        print(f"⏩ Resuming after chunk {entry['chunks']}: {entry['position']['count']} records "
+              f"already committed, last id {entry['last_id']}")
+    if partitions:
+        partitions.truncated = checkpoint.truncated(table)
+    return data, records, entry['chunks'] > 0
 
-def import_advances(cursor, data):
-    """Import advances data"""
-    print(f"📋 Importing {len(data)} advance records...")
+def import_table(cursor, table, args, metrics, manifest=None, checkpoint=None):
+    """Load one table from its export file using the selected mode
+
+    Records are converted once; ones that cannot be converted are quarantined
+    and, with a manifest, rows whose content hash is unchanged are skipped.
+    A partitioned attendance table gets its monthly partitions created as
+    needed, and with --replace-months the loaded months are truncated first.
+    With a checkpoint the rows are committed a chunk at a time, and a table
+    left part-way through carries on after its last committed chunk.
+    Rows, bytes and the time spent reading, parsing, transforming and
+    writing are recorded in metrics.
+    """
+    loader, partitions = LOADERS[table], None
+    if table == PARTITIONED_TABLE and is_partitioned(cursor):
+        loader, partitions = PARTITIONED_LOADER, MonthlyPartitions(cursor)
+    
+    loader.plan.reset()
+    stats = metrics.start(table)
+    data, records, resumed = open_table_export(table, checkpoint, partitions)
     
-    for record in data:
+    def chunks(items, key):
+        if checkpoint is None:
+            return [items]
+        return checkpoint.chunks(cursor, table, data, items, key, partitions)
+    
+    if args.mode == 'rows':
+        loaded = failed = 0
+        for chunk in chunks(records, lambda record: record.get('id')):
+            imported, bad = import_rows(cursor, loader, chunk, stats, partitions)
+            loaded += imported
+            failed += bad
+        stats.finish(loaded, rejected=failed, nbytes=export_size(data))
+    else:
+        rejects = RejectLog(table, append=resumed)
         try:
-            date_val = parse_datetime(record['date'])
-            cursor.execute("""
-                INSERT INTO advances (id, employee_name, date, amount, notes) 
-                VALUES (%s, %s, %s, %s, %s) 
-                ON CONFLICT (id) DO UPDATE SET
-                    employee_name = EXCLUDED.employee_name,
-                    date = EXCLUDED.date,
-                    amount = EXCLUDED.amount,
-                    notes = EXCLUDED.notes
-            """, (record['id'], record['employee_name'], 
-                  date_val, record['amount'], record['notes']))
-            print(f"✅ Imported advance: {record['employee_name']} - {record['date']}")
-        except Exception as e:
-            print(f"❌ Error importing advance {record['employee_name']}: {e}")
+            rows = stats.timed('parse', convert_records(loader, stats.timed('read', records), rejects))
+            if manifest:
+                rows = stats.timed('transform', manifest.changed(table, rows))
+            if args.mode == 'copy':
+                before_merge = partitions.before_merge(args.replace_months) if partitions else None
+                with stats.stage('write'):
+                    loaded = sum(bulk_import(cursor, loader, chunk, before_merge)
+                                 for chunk in chunks(stats.progress(rows), itemgetter(0)))
+            else:
+                if partitions:
+                    rows = stats.timed('transform', partitions.ensure_for(rows, loader.spec.columns.index('date')))
+                with stats.stage('write'):
+                    loaded = sum(batch_import(cursor, loader, chunk, args.batch_size, rejects, manifest)
+                                 for chunk in chunks(stats.progress(rows), itemgetter(0)))
+        finally:
+            rejects.close()
+        stats.finish(loaded, rejected=rejects.count,
+                     skipped=manifest.skipped[table] if manifest else 0, nbytes=export_size(data))
+        if rejects.count:
+            print(f"⚠️ Quarantined {rejects.count} bad rows in {rejects.path}")
+        if manifest:
+            print(f"⏭️ Skipped {manifest.skipped[table]} unchanged {table} rows")
+            if checkpoint:
+                # The table is committed; its hashes are kept even if a later table fails
+                manifest.save()
+    if partitions and partitions.truncated:
+        print(f"♻️ Reloaded {len(partitions.truncated)} {table} months by truncating their partitions")
+    for problem in loader.plan.report():
+        print(f"⚠️ {problem}")
+
+async def pipeline_table(connection, writers, table, args, metrics, manifest=None, checkpoint=None):
+    """Load one table through the asyncio pipeline (--mode pipeline)
+
+    Conversion, quarantining and skipping unchanged rows work as in the
+    other modes, in the transformer thread; the writers commit batch by
+    batch. connection is in autocommit, so a partition the transformer
+    creates exists before any of its rows are merged. With a checkpoint,
+    the position every writer has merged up to is saved each chunk.
+    """
+    cursor = connection.cursor()
+    loader, partitions = LOADERS[table], None
+    if table == PARTITIONED_TABLE and is_partitioned(cursor):
+        loader, partitions = PARTITIONED_LOADER, MonthlyPartitions(cursor)
+
+    loader.plan.reset()
+    stats = metrics.start(table)
+    data, records, resumed = open_table_export(table, checkpoint, partitions)
+    rejects = RejectLog(table, append=resumed)
+
+    def transform(records):
+        rows = convert_records(loader, records, rejects)
+        if manifest:
+            rows = manifest.changed(table, rows)
+        if partitions:
+            rows = partitions.ensure_for(rows, loader.spec.columns.index('date'))
+        return rows
+
+    on_advance = None
+    if checkpoint:
+        def on_advance(position, last_id):
+            if position['count'] - checkpoint.entry(table)['position']['count'] >= checkpoint.chunk_rows:
+                checkpoint.advance(table, position, last_id)
+
+    print(f"📋 Pipelining {table} records through {len(writers)} writers...")
+    try:
+        loaded = await load_pipelined(writers, BatchStatements(loader, connection), data, records, transform,
+                                      loader.key_positions, stats, args.batch_size,
+                                      args.queue_depth, on_advance)
+    finally:
+        rejects.close()
+        cursor.close()
+    if checkpoint:
+        checkpoint.finish(table)
+    print(f"✅ Merged {loaded} rows into {table}")
+    stats.finish(loaded, rejected=rejects.count,
+                 skipped=manifest.skipped[table] if manifest else 0, nbytes=export_size(data))
+    if rejects.count:
+        print(f"⚠️ Quarantined {rejects.count} bad rows in {rejects.path}")
+    if manifest:
+        print(f"⏭️ Skipped {manifest.skipped[table]} unchanged {table} rows")
+        if checkpoint:
+            manifest.save()
+    for problem in loader.plan.report():
+        print(f"⚠️ {problem}")
+
+def rebuild_manifest(connection, manifest):
+    """Recompute the content-hash manifest from the rows already in Supabase"""
+    for table, spec in TABLE_SPECS.items():
+        count = manifest.rebuild(connection, table, spec.columns)
+        print(f"✅ Hashed {count} {table} rows from the database")
+    connection.commit()
+    manifest.save()
 
-def main():
+class PlainOutput:
+    """Console stream that drops emoji, for terminals that cannot print them"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        return self.stream.write(EMOJI.sub('', text))
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Import JSON exports into Supabase PostgreSQL")
+    parser.add_argument('--mode', choices=['copy', 'batch', 'rows', 'pipeline'], default='copy',
+                        help="copy: COPY into staging tables and merge (default); "
+                             "batch: multi-row upserts with per-batch savepoints; "
+                             "rows: one INSERT ... ON CONFLICT per record; "
+                             "pipeline: asyncio reader, transformer and concurrent writers (needs asyncpg)")
+    parser.add_argument('--batch-size', type=int,
+                        help=f"rows per upsert statement in batch mode (default {DEFAULT_BATCH_SIZE}) "
+                             f"or per writer batch in pipeline mode (default {DEFAULT_PIPELINE_BATCH_SIZE})")
+    parser.add_argument('--writers', type=int, default=DEFAULT_WRITERS,
+                        help="pipeline mode: concurrent writer connections, each with a batch in flight")
+    parser.add_argument('--queue-depth', type=int, default=DEFAULT_QUEUE_DEPTH,
+                        help="pipeline mode: batches each queue holds before the stage feeding it waits")
+    parser.add_argument('--parallel', type=int, default=1,
+                        help="load employees first, then the child tables concurrently "
+                             "over this many connections")
+    parser.add_argument('--skip-unchanged', action='store_true',
+                        help="only send rows whose content hash differs from --manifest (copy, batch and pipeline modes)")
+    parser.add_argument('--rebuild-manifest', action='store_true',
+                        help="recompute --manifest from the target database first (implies --skip-unchanged)")
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST_FILE,
+                        help="content-hash manifest of the rows already imported")
+    parser.add_argument('--replace-months', action='store_true',
+                        help="with a partitioned attendance table, truncate the partitions of the "
+                             "months being loaded instead of upserting into them (copy mode, full exports only)")
+    parser.add_argument('--defer-indexes', action='store_true',
+                        help="drop the secondary indexes before loading, then rebuild them, "
+                             "ANALYZE and reset the id sequences")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS,
+                        help="commit every this many rows and record a checkpoint (without --parallel); "
+                             "0 loads everything in a single transaction")
+    parser.add_argument('--checkpoint-file', default=DEFAULT_CHECKPOINT_FILE,
+                        help="state file of the committed chunks, removed once the import completes")
+    parser.add_argument('--resume', action='store_true',
+                        help="carry on after the last chunk committed by an interrupted run")
+    parser.add_argument('--metrics-file', default=DEFAULT_METRICS_FILE,
+                        help="where to write the JSON report of rows, bytes, stage times and throughput")
+    parser.add_argument('--progress-interval', type=float, default=DEFAULT_PROGRESS_INTERVAL,
+                        help="seconds between progress lines while a table loads")
+    parser.add_argument('--debug', action='store_true',
+                        help="also log every imported record (rows mode)")
+    parser.add_argument('--plain', action='store_true',
+                        help="print without emoji (what import_simple.py runs with)")
+    args = parser.parse_args(argv)
+    if (args.skip_unchanged or args.rebuild_manifest) and args.mode == 'rows':
+        parser.error("--skip-unchanged needs --mode copy, batch or pipeline")
+    if args.replace_months and (args.mode != 'copy' or args.skip_unchanged or args.rebuild_manifest):
+        parser.error("--replace-months needs --mode copy and every row of the months, so no --skip-unchanged")
+    attendance_export = TABLE_SPECS[PARTITIONED_TABLE].export_file
+    if args.replace_months and is_delta_export(attendance_export):
+        parser.error(f"--replace-months needs a full export, but {delta_path(attendance_export)} "
+                     f"marks {attendance_export} as an --incremental delta")
+    if args.mode == 'pipeline' and args.parallel > 1:
+        parser.error("--mode pipeline has its own concurrency; use --writers instead of --parallel")
+    if args.mode == 'pipeline' and importlib.util.find_spec('asyncpg') is None:
+        parser.error("--mode pipeline needs asyncpg: pip install asyncpg")
+    if args.batch_size is None:
+        args.batch_size = DEFAULT_PIPELINE_BATCH_SIZE if args.mode == 'pipeline' else DEFAULT_BATCH_SIZE
+    if args.resume and (args.parallel > 1 or args.chunk_rows <= 0):
+        parser.error("--resume needs chunked commits: no --parallel and a positive --chunk-rows")
+    return args
+
+def run_on_new_connection(pool, step):
+    """Run step(cursor) in its own committed transaction, retrying transient errors"""
+    def attempt():
+        with pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                step(cursor)
+                connection.commit()
+            finally:
+                cursor.close()
+    retry_transient(attempt, what=step.__name__)
+
+def tables_to_import(checkpoint=None):
+    """(step, table) of every table to load, in dependency order, skipping finished ones"""
+    for step, table in enumerate(TABLE_SPECS, 1):
+        if checkpoint and checkpoint.done(table):
+            print(f"\n⏭️ Step {step}: {table.replace('_', ' ')} already imported")
+            continue
+        print(f"\n📋 Step {step}: Importing {table.replace('_', ' ')}...")
+        yield step, table
+
+def import_all(connection, args, metrics, manifest=None, checkpoint=None):
+    """Run the whole import on one connection
+
+    Without a checkpoint everything commits once at the end; with one,
+    each chunk commits as it is loaded and finished tables are skipped.
+    """
+    cursor = connection.cursor()
+    try:
+        if args.rebuild_manifest:
+            rebuild_manifest(connection, manifest)
+        if args.defer_indexes:
+            drop_indexes(cursor)
+        
+        for _, table in tables_to_import(checkpoint):
+            import_table(cursor, table, args, metrics, manifest, checkpoint)
+        if args.defer_indexes:
+            finish_bulk_load(cursor)
+        
+        # Commit all changes
+        connection.commit()
+    finally:
+        cursor.close()
+
+async def import_all_pipelined(connection, args, metrics, manifest=None, checkpoint=None):
+    """Run the whole import through the asyncio pipeline, one table after another
+
+    connection runs the schema steps; the rows go through --writers asyncpg
+    connections that commit batch by batch.
+    """
+    if args.rebuild_manifest:
+        rebuild_manifest(connection, manifest)
+    writers = await open_writers(args.writers)
+    cursor = connection.cursor()
+    try:
+        if args.defer_indexes:
+            drop_indexes(cursor)
+        # Nothing may stay uncommitted here while the writers run, or they would wait on its locks
+        connection.commit()
+        connection.autocommit = True
+        for _, table in tables_to_import(checkpoint):
+            await pipeline_table(connection, writers, table, args, metrics, manifest, checkpoint)
+        connection.autocommit = False
+        if args.defer_indexes:
+            finish_bulk_load(cursor)
+            connection.commit()
+    finally:
+        cursor.close()
+        if connection.autocommit:
+            connection.autocommit = False
+        await close_writers(writers)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.plain:
+        return run(args)
+    with redirect_stdout(PlainOutput(sys.stdout)), redirect_stderr(PlainOutput(sys.stderr)):
+        return run(args)
+
+def run(args):
+    """Run the import described by the parsed command line"""
+    configure_logging(args.debug)
     print("Importing data from JSON files to Supabase PostgreSQL")
     print("=" * 60)
     
-    # Connect to Supabase
-    connection = create_supabase_connection()
-    if not connection:
-        print("❌ Cannot proceed without Supabase connection")
-        return
+    manifest = None
+    if args.skip_unchanged or args.rebuild_manifest:
+        manifest = HashManifest(args.manifest)
     
-    cursor = connection.cursor()
+    checkpoint = None
+    if args.parallel <= 1 and args.chunk_rows > 0:
+        if args.resume and not os.path.exists(args.checkpoint_file):
+            print(f"⚠️ No checkpoint in {args.checkpoint_file}; starting from the beginning")
+        elif not args.resume and os.path.exists(args.checkpoint_file):
+            print(f"⚠️ Starting over; --resume would carry on from {args.checkpoint_file}")
+        checkpoint = ImportCheckpoint(args.checkpoint_file, args.chunk_rows, args.resume)
+    
+    # Connections are opened on first use and retried while Supabase is unreachable
+    pool = ConnectionPool(size=max(args.parallel, 1))
+    metrics = RunMetrics('import', args.progress_interval)
+    status = 'failed'
     
     try:
-        # Import employees
-        print("\n📋 Step 1: Importing employees...")
-        with open('employees_export.json', 'r') as f:
-            employees = json.load(f)
-        import_employees(cursor, employees)
-        
-        # Import attendance
-        print("\n📋 Step 2: Importing attendance...")
-        with open('attendance_export.json', 'r') as f:
-            attendance = json.load(f)
-        import_attendance(cursor, attendance)
-        
-        # Import travel expenses
-        print("\n📋 Step 3: Importing travel expenses...")
-        with open('travel_expenses_export.json', 'r') as f:
-            travel_expenses = json.load(f)
-        import_travel_expenses(cursor, travel_expenses)
-        
-        # Import general expenses
-        print("\n📋 Step 4: Importing general expenses...")
-        with open('general_expenses_export.json', 'r') as f:
-            general_expenses = json.load(f)
-        import_general_expenses(cursor, general_expenses)
-        
-        # Import advances
-        print("\n📋 Step 5: Importing advances...")
-        with open('advances_export.json', 'r') as f:
-            advances = json.load(f)
-        import_advances(cursor, advances)
+        if args.parallel > 1:
+            if args.rebuild_manifest:
+                def rebuild():
+                    with pool.connection() as connection:
+                        rebuild_manifest(connection, manifest)
+                retry_transient(rebuild, what="Rebuilding the manifest")
+            if args.defer_indexes:
+                run_on_new_connection(pool, drop_indexes)
+            try:
+                run_import(list(TABLE_SPECS), pool,
+                           lambda cursor, table: import_table(cursor, table, args, metrics, manifest),
+                           args.parallel)
+            finally:
+                # The workers commit separately, so the indexes come back even if a level failed
+                if args.defer_indexes:
+                    run_on_new_connection(pool, finish_bulk_load)
+        else:
+            # A transient failure rolls back the uncommitted work: the chunk in flight,
+            # or with --chunk-rows 0 the whole import, which then starts over.
+            # Pipeline writers commit each batch; the retry carries on from the checkpoint
+            def attempt():
+                with pool.connection() as connection:
+                    if args.mode == 'pipeline':
+                        asyncio.run(import_all_pipelined(connection, args, metrics, manifest, checkpoint))
+                    else:
+                        import_all(connection, args, metrics, manifest, checkpoint)
+            retry_transient(attempt, what="Import")
+            if checkpoint:
+                checkpoint.clear()
         
-        # Commit all changes
-        connection.commit()
+        if manifest:
+            manifest.save()
+        status = 'ok'
         print("\n🎉 Data import completed successfully!")
         print("✅ All data has been migrated to Supabase!")
         
     except Exception as e:
         print(f"❌ Import error: {e}")
-        connection.rollback()
     finally:
-        if connection:
-            cursor.close()
-            connection.close()
-            print("✅ Database connection closed")
+        pool.close()
+        print("✅ Database connection closed")
+        report = metrics.write(args.metrics_file, status)
+        print(f"📊 {report['rows']} rows in {report['elapsed']:.1f}s "
+              f"({report['rows_per_second']} rows/s); metrics saved to {args.metrics_file}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Dependency-aware concurrent import scheduler
+Loads tables level by level (employees before the tables that reference
+it), spreading each level over connections from a bounded pool; a level
+that fails on a transient error is rolled back and loaded again
+"""
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from db_connection import retry_transient
+from table_specs import TABLE_SPECS
+
+# Tables each table depends on; a table loads only after all of them are committed
+TABLE_DEPENDENCIES = {name: spec.depends_on for name, spec in TABLE_SPECS.items()}
+
+
+def dependency_levels(tables, dependencies=TABLE_DEPENDENCIES):
+    """Group tables into levels whose dependencies are all in earlier levels"""
+    remaining = list(tables)
+    levels = []
+    while remaining:
+        level = [t for t in remaining
+                 if not any(d in remaining for d in dependencies.get(t, ()))]
+        if not level:
+            raise ValueError(f"Circular table dependencies among {remaining}")
+        levels.append(level)
+        remaining = [t for t in remaining if t not in level]
+    return levels
+
+
+def run_level(tables, pool, load_table, workers):
+    """Load tables concurrently and commit them together
+
+    Each worker owns one connection and one transaction, pulling tables
+    from a shared queue. Nothing is committed until every worker has
+    finished (the consistency barrier); if any table fails, all workers
+    roll back and the first error is raised.
+    """
+    pending = queue.Queue()
+    for table in tables:
+        pending.put(table)
+    failed = threading.Event()
+
+    connections = []
+    try:
+        for _ in range(min(workers, len(tables))):
+            connections.append(pool.get())
+
+        def work(connection):
+            cursor = connection.cursor()
+            try:
+                while not failed.is_set():
+                    try:
+                        table = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    load_table(cursor, table)
+            except Exception:
+                failed.set()
+                raise
+            finally:
+                cursor.close()
+
+        with ThreadPoolExecutor(max_workers=len(connections)) as executor:
+            futures = [executor.submit(work, connection) for connection in connections]
+            errors = [future.exception() for future in futures if future.exception()]
+
+        if errors:
+            raise errors[0]
+        for connection in connections:
+            connection.commit()
+    finally:
+        # Uncommitted work is rolled back as the connections go back to the pool
+        for connection in connections:
+            pool.put(connection)
+
+
+def run_import(tables, pool, load_table, workers):
+    """Import tables level by level, each level in parallel over at most workers pooled connections"""
+    for level in dependency_levels(tables):
+        retry_transient(lambda: run_level(level, pool, load_table, workers),
+                        what=f"Loading {', '.join(level)}")
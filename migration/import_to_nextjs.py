@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Import the JSON exports into the Next.js app schema
+Loads the tables created by admin-portal-nextjs/setup-database.sql, resolving
+employee names to ids and computing attendance hours while the records stream
+in, then refreshes the monthly rollups of the months the import touched.
+Imported rows are keyed by the legacy table and id they came from and get
+their ids from the app's sequences, so the app's own rows are left alone.
+"""
+
+import argparse
+from psycopg2 import sql
+from batch_loader import RejectLog
+from db_connection import create_supabase_connection
+from employee_index import DEFAULT_UNMATCHED_FILE, EmployeeIndex
+from expense_merge import merged_expenses
+from export_reader import open_export
+from monthly_rollups import TouchedMonths, rebuild_rollups, refresh_rollups, with_total_hours
+from pipeline_metrics import DEFAULT_PROGRESS_INTERVAL, RunMetrics
+from table_loader import TableLoader, convert_records
+from table_specs import NEXTJS_SPECS
+
+DEFAULT_METRICS_FILE = 'nextjs_import_metrics.json'
+
+# Legacy key columns and their unique index, added to an app table if missing
+ADD_LEGACY_KEY = """
+    ALTER TABLE {table}
+        ADD COLUMN IF NOT EXISTS legacy_source VARCHAR(50),
+        ADD COLUMN IF NOT EXISTS legacy_id INTEGER;
+    CREATE UNIQUE INDEX IF NOT EXISTS {index} ON {table} (legacy_source, legacy_id)
+"""
+
+# Next.js table -> loader compiled from its spec
+LOADERS = {name: TableLoader(spec) for name, spec in NEXTJS_SPECS.items()}
+
+def with_legacy_key(table, records):
+    """Yield records tagged with the legacy table and id they came from"""
+    for record in records:
+        record['legacy_source'] = table
+        record['legacy_id'] = record.get('id')
+        yield record
+
+# Next.js table -> record stream built from the legacy exports and the employee index
+SOURCES = {
+    'attendance': lambda index: with_total_hours(index.rewrite('attendance', with_legacy_key(
+        'attendance', open_export(NEXTJS_SPECS['attendance'].export_file)))),
+    'expenses': merged_expenses,
+}
+
+def add_legacy_keys(cursor):
+    """Add the legacy key columns and their unique index to the app tables"""
+    for table in NEXTJS_SPECS:
+        cursor.execute(sql.SQL(ADD_LEGACY_KEY).format(table=sql.Identifier(table),
+                                                      index=sql.Identifier(f"idx_{table}_legacy_key")))
+
+def app_employee_ids(cursor):
+    """Legacy employee id -> id of the app employee it was imported as"""
+    cursor.execute("SELECT legacy_id, id FROM employees WHERE legacy_source = 'employees'")
+    return dict(cursor.fetchall())
+
+def load_table(cursor, table, records, metrics, touched=None):
+    """COPY and merge one table's records, noting their months in touched
+
+    The read stage of the metrics includes resolving employee names and
+    mapping expenses, which happen as the records stream in.
+    """
+    print(f"📋 Bulk loading {table} records...")
+    LOADERS[table].plan.reset()
+    stats = metrics.start(table)
+    rejects = RejectLog(table)
+    try:
+        rows = stats.timed('parse', convert_records(LOADERS[table], stats.timed('read', records), rejects))
+        if touched is not None:
+            rows = stats.timed('transform', touched.track(rows, NEXTJS_SPECS[table].columns.index('date')))
+        with stats.stage('write'):
+            copied, merged = LOADERS[table].copy(cursor, stats.progress(rows))
+    finally:
+        rejects.close()
+    stats.finish(copied, rejected=rejects.count)
+    print(f"✅ Copied {copied} rows, merged {merged} into {table}")
+    if rejects.count:
+        print(f"⚠️ Quarantined {rejects.count} bad rows in {rejects.path}")
+    for problem in LOADERS[table].plan.report():
+        print(f"⚠️ {problem}")
+
+def import_nextjs(cursor, metrics, unmatched_file=DEFAULT_UNMATCHED_FILE, rebuild=False):
+    """Load employees, then every employee-keyed table through the name index
+
+    Names are resolved to the app ids the legacy employees were merged as.
+    """
+    employees = list(open_export(NEXTJS_SPECS['employees'].export_file))
+    index = EmployeeIndex(employees)
+    for duplicate in index.duplicates:
+        print(f"⚠️ Duplicate employee name {duplicate['name']!r} (ID: {duplicate['id']}); "
+              f"rows resolve to the first one")
+
+    add_legacy_keys(cursor)
+    load_table(cursor, 'employees', with_legacy_key('employees', employees), metrics)
+    index.remap(app_employee_ids(cursor))
+    touched = TouchedMonths()
+    for table, records in SOURCES.items():
+        load_table(cursor, table, records(index), metrics, touched)
+
+    if rebuild:
+        summaries = rebuild_rollups(cursor)
+        print(f"✅ Rebuilt {summaries} monthly summary rows")
+    else:
+        months = touched.months()
+        summaries = refresh_rollups(cursor, months)
+        print(f"✅ Refreshed {summaries} monthly summary rows for {len(months)} months")
+
+    unmatched = index.write_unmatched(unmatched_file)
+    if unmatched:
+        print(f"⚠️ {unmatched} employee names did not match and their rows were skipped; "
+              f"the names and row counts per table are in {unmatched_file}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Import JSON exports into the Next.js app schema")
+    parser.add_argument('--unmatched-file', default=DEFAULT_UNMATCHED_FILE,
+                        help="where to list employee names that match no employee")
+    parser.add_argument('--rebuild-rollups', action='store_true',
+                        help="recompute every month of the monthly summary, not just the imported ones")
+    parser.add_argument('--metrics-file', default=DEFAULT_METRICS_FILE,
+                        help="where to write the JSON report of rows, stage times and throughput")
+    parser.add_argument('--progress-interval', type=float, default=DEFAULT_PROGRESS_INTERVAL,
+                        help="seconds between progress lines while a table loads")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    print("Importing data from JSON files into the Next.js schema")
+    print("=" * 60)
+
+    connection = create_supabase_connection()
+    if not connection:
+        print("❌ Cannot proceed without Supabase connection")
+        return
+
+    cursor = connection.cursor()
+    metrics = RunMetrics('nextjs_import', args.progress_interval)
+    status = 'failed'
+
+    try:
+        import_nextjs(cursor, metrics, args.unmatched_file, args.rebuild_rollups)
+        connection.commit()
+        status = 'ok'
+        print("\n🎉 Next.js import completed successfully!")
+    except Exception as e:
+        print(f"❌ Import error: {e}")
+        connection.rollback()
+    finally:
+        cursor.close()
+        connection.close()
+        print("✅ Database connection closed")
+        report = metrics.write(args.metrics_file, status)
+        print(f"📊 {report['rows']} rows in {report['elapsed']:.1f}s "
+              f"({report['rows_per_second']} rows/s); metrics saved to {args.metrics_file}")
+
+if __name__ == "__main__":
+    main()
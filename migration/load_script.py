@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Write the JSON exports as one self-contained psql load script
+The script creates the schema, COPYs every table into a staging table,
+merges it, then rebuilds indexes, analyzes and resets the id sequences, all
+in one transaction. It is generated offline by running the importer's own
+statements against a cursor that writes SQL instead of executing it, so
+applying it gives the same end state as the live copy-mode import:
+    python load_script.py --output migration_load.sql.gz
+    gunzip -c migration_load.sql.gz | psql "$DATABASE_URL"
+"""
+
+import argparse
+import gzip
+from datetime import date, datetime, time
+from psycopg2 import sql
+from attendance_partitions import PARTITIONED_LOADER, PARTITIONED_TABLE, MonthlyPartitions
+from batch_loader import RejectLog
+from export_reader import delta_path, export_size, is_delta_export, open_export
+from monthly_rollups import TouchedMonths
+from pipeline_metrics import RunMetrics
+from setup_supabase_tables import create_indexes, create_tables, drop_indexes, finish_bulk_load
+from table_loader import LOADERS, convert_records
+from table_specs import TABLE_SPECS
+
+DEFAULT_OUTPUT = 'migration_load.sql'
+DEFAULT_METRICS_FILE = 'load_script_metrics.json'
+
+# Characters read from a CopyStream per write to the script
+COPY_READ_SIZE = 1 << 16
+
+
+def quote_ident(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def quote_literal(value):
+    """Render a parameter as an SQL literal without a server connection"""
+    if value is None:
+        return 'NULL'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return repr(value) if value == value and abs(value) != float('inf') else f"'{value}'::float8"
+    if isinstance(value, datetime):
+        return f"'{value.isoformat()}'::timestamp"
+    if isinstance(value, date):
+        return f"'{value.isoformat()}'::date"
+    if isinstance(value, time):
+        return f"'{value.isoformat()}'::time"
+    if isinstance(value, str):
+        if '\\' in value:
+            return "E'" + value.replace('\\', '\\\\').replace("'", "''") + "'"
+        return "'" + value.replace("'", "''") + "'"
+    raise TypeError(f"Cannot render {type(value).__name__} as an SQL literal")
+
+
+def render(query, params=None):
+    """A psycopg2.sql composable (or string) with its parameters, as plain SQL text"""
+    if isinstance(query, sql.Composed):
+        text = ''.join(render(part) for part in query.seq)
+    elif isinstance(query, sql.SQL):
+        text = query.string
+    elif isinstance(query, sql.Identifier):
+        text = '.'.join(map(quote_ident, query.strings))
+    elif isinstance(query, sql.Literal):
+        text = quote_literal(query.wrapped)
+    elif isinstance(query, str):
+        text = query
+    else:
+        raise TypeError(f"Cannot render {type(query).__name__}")
+    if params is None:
+        return text
+    if isinstance(params, dict):
+        return text % {name: quote_literal(value) for name, value in params.items()}
+    return text % tuple(map(quote_literal, params))
+
+
+class ScriptCursor:
+    """Cursor stand-in that appends each statement to a psql script
+
+    Only what the load path needs: execute and copy_expert. There are no
+    results offline, so the statements written must not need reading back;
+    checks run server-side in DO blocks instead.
+    """
+
+    rowcount = -1
+
+    def __init__(self, out):
+        self.out = out
+        self.statements = 0
+
+    def execute(self, query, params=None):
+        self.out.write(render(query, params).strip() + ';\n\n')
+        self.statements += 1
+
+    def copy_expert(self, query, stream):
+        self.out.write(render(query).strip() + ';\n')
+        while True:
+            data = stream.read(COPY_READ_SIZE)
+            if not data:
+                break
+            self.out.write(data)
+        self.out.write('\\.\n\n')
+        self.statements += 1
+
+
+def write_table(cursor, table, metrics, partition_attendance=False, replace_months=False):
+    """Append one table's COPY block and merge; returns the number of rows written"""
+    loader, partitions, touched = LOADERS[table], None, None
+    if table == PARTITIONED_TABLE and partition_attendance:
+        loader, partitions, touched = PARTITIONED_LOADER, MonthlyPartitions(cursor), TouchedMonths()
+
+    loader.plan.reset()
+    stats = metrics.start(table)
+    data = open_export(TABLE_SPECS[table].export_file)
+    rejects = RejectLog(table)
+    try:
+        rows = stats.timed('parse', convert_records(loader, stats.timed('read', data), rejects))
+        before_merge = None
+        if partitions:
+            # The months are known once the COPY block is written, before the merge
+            rows = touched.track(rows, loader.spec.columns.index('date'))
+            before_merge = lambda cursor, staging: partitions.prepare_months(touched.months(), replace_months)
+        with stats.stage('write'):
+            written, _ = loader.copy(cursor, stats.progress(rows), before_merge)
+    finally:
+        rejects.close()
+    stats.finish(written, rejected=rejects.count, nbytes=export_size(data))
+
+    print(f"✅ Wrote {written} {table} rows")
+    if rejects.count:
+        print(f"⚠️ Quarantined {rejects.count} bad rows in {rejects.path}")
+    if partitions:
+        print(f"✅ {len(touched.months())} {table} months get their partitions created"
+              + (" and truncated" if replace_months else ""))
+    for problem in loader.plan.report():
+        print(f"⚠️ {problem}")
+    return written
+
+
+def write_script(out, args, metrics):
+    """Write the whole load script to out"""
+    out.write(f"-- Admin portal migration load script, generated {datetime.now().isoformat(timespec='seconds')}\n")
+    out.write(f"-- Apply with: {apply_command(args.output)}\n\n")
+    out.write("\\set ON_ERROR_STOP on\n\n")
+    cursor = ScriptCursor(out)
+    cursor.execute("SET client_encoding = 'UTF8'")
+    cursor.execute("SET client_min_messages = warning")
+    cursor.execute("BEGIN")
+    create_tables(cursor, args.partition_attendance)
+    if args.defer_indexes:
+        drop_indexes(cursor)
+    else:
+        create_indexes(cursor)
+    for table in TABLE_SPECS:
+        write_table(cursor, table, metrics, args.partition_attendance, args.replace_months)
+    finish_bulk_load(cursor)
+    cursor.execute("COMMIT")
+    return cursor.statements
+
+
+def open_output(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'wt', compresslevel=6, encoding='utf-8')
+    return open(path, 'w', encoding='utf-8')
+
+
+def apply_command(path):
+    if path.endswith('.gz'):
+        return f"gunzip -c {path} | psql \"$DATABASE_URL\""
+    return f"psql \"$DATABASE_URL\" -f {path}"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Write the JSON exports as a single-session psql load script")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help="script to write; a .gz name is gzip-compressed")
+    parser.add_argument('--partition-attendance', action='store_true',
+                        help="target a partitioned attendance table, creating each loaded month's partition "
+                             "and deleting a loaded id's copy under another date before merging")
+    parser.add_argument('--replace-months', action='store_true',
+                        help="with --partition-attendance, truncate the loaded months' partitions before merging")
+    parser.add_argument('--defer-indexes', action='store_true',
+                        help="drop the secondary indexes before loading; they are rebuilt at the end")
+    parser.add_argument('--metrics-file', default=DEFAULT_METRICS_FILE,
+                        help="where to write the JSON report of rows, bytes and stage times")
+    args = parser.parse_args()
+    if args.replace_months and not args.partition_attendance:
+        parser.error("--replace-months needs --partition-attendance")
+    attendance_export = TABLE_SPECS[PARTITIONED_TABLE].export_file
+    if args.replace_months and is_delta_export(attendance_export):
+        parser.error(f"--replace-months needs a full export, but {delta_path(attendance_export)} "
+                     f"marks {attendance_export} as an --incremental delta")
+    return args
+
+
+def main():
+    args = parse_args()
+    print("Writing the JSON exports as a psql load script")
+    print("=" * 60)
+
+    metrics = RunMetrics('load_script')
+    status = 'failed'
+    try:
+        with open_output(args.output) as out:
+            statements = write_script(out, args, metrics)
+        status = 'ok'
+        print(f"\n🎉 Wrote {statements} statements to {args.output}")
+        print(f"📋 Apply with: {apply_command(args.output)}")
+    except Exception as e:
+        print(f"❌ Script error: {e}")
+    finally:
+        report = metrics.write(args.metrics_file, status)
+        print(f"📊 {report['rows']} rows, {report['bytes']} bytes read in {report['elapsed']:.1f}s; "
+              f"metrics saved to {args.metrics_file}")
+
+
+if __name__ == "__main__":
+    main()
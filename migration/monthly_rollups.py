@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Precomputed attendance hours and per-employee monthly rollups for the Next.js schema
+total_hours is filled in while attendance streams in, and the monthly
+summary is refreshed only for the months the import touched
+"""
+
+from functools import lru_cache
+
+SUMMARY_TABLE = 'employee_monthly_summary'
+
+CREATE_SUMMARY_TABLE = f"""
+    CREATE TABLE IF NOT EXISTS {SUMMARY_TABLE} (
+        employee_id INTEGER NOT NULL REFERENCES employees(id) ON DELETE CASCADE,
+        month DATE NOT NULL,
+        hours DECIMAL(8,2) NOT NULL DEFAULT 0,
+        days_present INTEGER NOT NULL DEFAULT 0,
+        travel_km DECIMAL(10,2) NOT NULL DEFAULT 0,
+        expense_total DECIMAL(12,2) NOT NULL DEFAULT 0,
+        advance_total DECIMAL(12,2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (employee_id, month)
+    )
+"""
+
+# Recompute the rollup rows of the given months from attendance and expenses
+REFRESH_SUMMARY = f"""
+    WITH months AS (
+        SELECT DISTINCT unnest(%(months)s::date[]) AS month
+    ), monthly AS (
+        SELECT a.employee_id, m.month,
+               SUM(a.total_hours) AS hours,
+               COUNT(DISTINCT a.date) FILTER (
+                   WHERE a.shift1_in IS NOT NULL OR a.shift2_in IS NOT NULL) AS days_present,
+               0 AS travel_km, 0 AS expense_total, 0 AS advance_total
+        FROM attendance a
+        JOIN months m ON a.date >= m.month AND a.date < m.month + INTERVAL '1 month'
+        GROUP BY a.employee_id, m.month
+        UNION ALL
+        SELECT e.employee_id, m.month, 0, 0,
+               COALESCE(SUM(e.kilometers) FILTER (WHERE e.expense_type = 'Travel'), 0),
+               COALESCE(SUM(e.amount) FILTER (WHERE e.expense_type IS DISTINCT FROM 'Advance'), 0),
+               COALESCE(SUM(e.amount) FILTER (WHERE e.expense_type = 'Advance'), 0)
+        FROM expenses e
+        JOIN months m ON e.date >= m.month AND e.date < m.month + INTERVAL '1 month'
+        GROUP BY e.employee_id, m.month
+    )
+    INSERT INTO {SUMMARY_TABLE}
+        (employee_id, month, hours, days_present, travel_km, expense_total, advance_total)
+    SELECT employee_id, month, SUM(hours), SUM(days_present),
+           SUM(travel_km), SUM(expense_total), SUM(advance_total)
+    FROM monthly
+    WHERE employee_id IS NOT NULL
+    GROUP BY employee_id, month
+"""
+
+
+@lru_cache(maxsize=4096)
+def time_seconds(value):
+    """'HH:MM:SS' -> seconds since midnight"""
+    hours, minutes, seconds = value.split(':')
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+
+def shift_hours(start, end):
+    """Hours between two 'HH:MM:SS' times, or 0 if either is missing
+
+    A shift that ends before it starts is taken to run past midnight.
+    """
+    if not start or not end:
+        return 0
+    seconds = time_seconds(end) - time_seconds(start)
+    if seconds < 0:
+        seconds += 86400
+    return round(seconds / 3600, 2)
+
+
+def with_total_hours(records):
+    """Yield attendance records with total_hours filled in from both shifts"""
+    for record in records:
+        try:
+            record['total_hours'] = round(
+                shift_hours(record['shift1_in'], record['shift1_out']) +
+                shift_hours(record['shift2_in'], record['shift2_out']), 2)
+        except (KeyError, TypeError, ValueError):
+            record['total_hours'] = 0
+        yield record
+
+
+class TouchedMonths:
+    """Collects the months of the rows passing through a load"""
+
+    def __init__(self):
+        self.dates = set()
+
+    def track(self, rows, date_position):
+        """Yield rows unchanged, remembering the date at date_position"""
+        add = self.dates.add
+        for row in rows:
+            add(row[date_position])
+            yield row
+
+    def months(self):
+        """The first day of every month seen, sorted"""
+        return sorted({day.replace(day=1) for day in self.dates if day is not None})
+
+
+def refresh_rollups(cursor, months):
+    """Replace the summary rows of the given months; returns the number written"""
+    cursor.execute(CREATE_SUMMARY_TABLE)
+    if not months:
+        return 0
+    cursor.execute(f"DELETE FROM {SUMMARY_TABLE} WHERE month = ANY(%(months)s::date[])",
+                   {'months': months})
+    cursor.execute(REFRESH_SUMMARY, {'months': months})
+    return cursor.rowcount
+
+
+def rebuild_rollups(cursor):
+    """Recompute the whole summary table; returns the number of rows written"""
+    cursor.execute(CREATE_SUMMARY_TABLE)
+    cursor.execute(f"DELETE FROM {SUMMARY_TABLE}")
+    cursor.execute("""
+        SELECT date_trunc('month', date)::date FROM attendance
+        UNION
+        SELECT date_trunc('month', date)::date FROM expenses
+    """)
+    months = sorted(month for month, in cursor.fetchall() if month is not None)
+    return refresh_rollups(cursor, months)
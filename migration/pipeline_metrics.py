@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Low-overhead metrics for the export and import scripts
+Per-table counters and per-stage timers (read, parse, transform, write), a
+progress line printed at most every few seconds, and a JSON report written
+at the end of the run. Per-row messages go through logging at DEBUG level.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+DEFAULT_PROGRESS_INTERVAL = 5.0
+
+# Rows between clock checks for the progress line
+PROGRESS_CHECK_ROWS = 1024
+
+STAGES = ('read', 'parse', 'transform', 'write')
+
+
+def configure_logging(debug=False):
+    """Send log messages to the console; per-row messages only with debug"""
+    logging.basicConfig(level=logging.DEBUG if debug else logging.INFO, format='%(message)s')
+
+
+class TableMetrics:
+    """Counters and stage timers of one table's load or export
+
+    Stage time is exclusive: while a stage pulls items from an earlier
+    stage, the clock runs for the earlier one, so the stage times of a
+    generator pipeline add up to its elapsed time.
+    """
+
+    def __init__(self, name, progress_interval=DEFAULT_PROGRESS_INTERVAL):
+        self.name = name
+        self.rows = 0
+        self.bytes = 0
+        self.rejected = 0
+        self.skipped = 0
+        self.seconds = Counter()
+        self.progress_interval = progress_interval
+        self._stack = []
+        self._mark = self.started = self._last_progress = time.perf_counter()
+        self.finished = None
+        self._seen = 0
+
+    def _enter(self, stage):
+        now = time.perf_counter()
+        if self._stack:
+            self.seconds[self._stack[-1]] += now - self._mark
+        self._stack.append(stage)
+        self._mark = now
+
+    def _leave(self):
+        now = time.perf_counter()
+        self.seconds[self._stack.pop()] += now - self._mark
+        self._mark = now
+
+    @contextmanager
+    def stage(self, stage):
+        """Time a block as stage"""
+        self._enter(stage)
+        try:
+            yield
+        finally:
+            self._leave()
+
+    def timed(self, stage, items):
+        """Yield items unchanged, timing the work of producing them as stage"""
+        enter, leave = self._enter, self._leave
+        iterator = iter(items)
+        while True:
+            enter(stage)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                leave()
+            yield item
+
+    def progress(self, items):
+        """Yield items unchanged, counting them and printing a throttled progress line"""
+        for item in items:
+            self._seen += 1
+            if self._seen % PROGRESS_CHECK_ROWS == 0:
+                self._show_progress()
+            yield item
+
+    def busy(self, stage, seconds):
+        """Add time a concurrent worker spent in stage; such stages overlap in time"""
+        self.seconds[stage] += seconds
+
+    def add(self, count):
+        """Count rows handled a chunk at a time, printing the progress line when due"""
+        self._seen += count
+        self._show_progress()
+
+    def _show_progress(self):
+        now = time.perf_counter()
+        if now - self._last_progress >= self.progress_interval:
+            self._last_progress = now
+            print(f"... {self.name}: {self._seen} rows, "
+                  f"{self._seen / (now - self.started):.0f} rows/s", flush=True)
+
+    def finish(self, rows=None, rejected=None, skipped=None, nbytes=None):
+        """Record the final counts and stop the clock"""
+        self.finished = time.perf_counter()
+        self.rows = self._seen if rows is None else rows
+        if rejected is not None:
+            self.rejected = rejected
+        if skipped is not None:
+            self.skipped = skipped
+        if nbytes is not None:
+            self.bytes = nbytes
+
+    def report(self):
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        return {
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'rejected': self.rejected,
+            'skipped': self.skipped,
+            'elapsed': round(elapsed, 3),
+            'rows_per_second': round(self.rows / elapsed, 1) if elapsed else None,
+            'stages': {stage: round(self.seconds[stage], 3) for stage in STAGES if stage in self.seconds},
+        }
+
+
+class RunMetrics:
+    """All table metrics of one run, safe to share between worker threads"""
+
+    def __init__(self, script, progress_interval=DEFAULT_PROGRESS_INTERVAL):
+        self.script = script
+        self.progress_interval = progress_interval
+        self.started_at = datetime.now()
+        self.started = time.perf_counter()
+        self.tables = {}
+        self._lock = threading.Lock()
+
+    def start(self, table, part=None):
+        """Fresh metrics for a table (or one part file of it), replacing a failed attempt's"""
+        metrics = TableMetrics(table if part is None else f"{table} {part}", self.progress_interval)
+        with self._lock:
+            self.tables[(table, part)] = metrics
+        return metrics
+
+    def report(self, status='ok'):
+        """The run as a JSON-ready dict, with the parts of split tables summed"""
+        elapsed = time.perf_counter() - self.started
+        tables = {}
+        for (table, _), metrics in list(self.tables.items()):
+            entry = metrics.report()
+            total = tables.setdefault(table, dict(entry, rows=0, bytes=0, rejected=0, skipped=0, stages={}))
+            for key in ('rows', 'bytes', 'rejected', 'skipped'):
+                total[key] += entry[key]
+            total['elapsed'] = max(total['elapsed'], entry['elapsed'])
+            total['rows_per_second'] = round(total['rows'] / total['elapsed'], 1) if total['elapsed'] else None
+            for stage, seconds in entry['stages'].items():
+                total['stages'][stage] = round(total['stages'].get(stage, 0) + seconds, 3)
+        rows = sum(entry['rows'] for entry in tables.values())
+        return {
+            'script': self.script,
+            'status': status,
+            'started': self.started_at.isoformat(timespec='seconds'),
+            'elapsed': round(elapsed, 3),
+            'rows': rows,
+            'bytes': sum(entry['bytes'] for entry in tables.values()),
+            'rejected': sum(entry['rejected'] for entry in tables.values()),
+            'rows_per_second': round(rows / elapsed, 1) if elapsed else None,
+            'tables': tables,
+        }
+
+    def write(self, path, status='ok'):
+        """Atomically write the JSON report; returns it"""
+        report = self.report(status)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(report, f, indent=2)
+        os.replace(path + '.tmp', path)
+        return report
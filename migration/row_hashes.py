@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Content-hash manifest for incremental imports
+Keeps one hash per (table, id) for the rows already loaded into Supabase,
+so re-imports only send rows that are new or have changed
+"""
+
+import hashlib
+import json
+import os
+from copy_loader import format_copy_value
+
+DEFAULT_MANIFEST_FILE = 'import_manifest.json'
+
+
+def row_hash(row):
+    """Hash a converted row; numbers are normalised so 5000 and 5000.0 match"""
+    text = '\t'.join(
+        repr(float(value)) if isinstance(value, (int, float)) and not isinstance(value, bool)
+        else format_copy_value(value)
+        for value in row
+    )
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class HashManifest:
+    """Per-table {id: row hash} of what the target database holds"""
+
+    def __init__(self, path=DEFAULT_MANIFEST_FILE):
+        self.path = path
+        self.hashes = {}
+        self.updates = {}
+        self.skipped = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.hashes = json.load(f)
+
+    def changed(self, table, rows):
+        """Yield only the rows whose content differs from the manifest
+
+        New hashes are held per table until save(), which callers run after
+        the import has committed; calling this again for a table (a retried
+        load) starts that table's pending hashes over. Once a copy of an id
+        has been sent, its later copies are sent too, so the last copy in
+        the export wins as it does in the merge.
+        """
+        known = self.hashes.get(table, {})
+        updates = self.updates[table] = {}
+        self.skipped[table] = 0
+        for row in rows:
+            key = str(row[0])
+            digest = row_hash(row)
+            if known.get(key) == digest and key not in updates:
+                self.skipped[table] += 1
+                continue
+            updates[key] = digest
+            yield row
+
+    def forget(self, table, row_id):
+        """Drop a row that failed to load, so the next run sends it again"""
+        self.updates.get(table, {}).pop(str(row_id), None)
+
+    def rebuild(self, connection, table, columns):
+        """Replace a table's hashes with ones computed from the rows in the database"""
+        cursor = connection.cursor(name=f"manifest_{table}")
+        cursor.itersize = 5000
+        try:
+            cursor.execute(f"SELECT {', '.join(columns)} FROM {table}")
+            self.hashes[table] = {str(row[0]): row_hash(row) for row in cursor}
+            self.updates.pop(table, None)
+        finally:
+            cursor.close()
+        return len(self.hashes[table])
+
+    def save(self):
+        """Apply the pending hashes and atomically write the manifest"""
+        for table, updates in self.updates.items():
+            self.hashes.setdefault(table, {}).update(updates)
+        self.updates = {}
+        with open(self.path + '.tmp', 'w') as f:
+            json.dump(self.hashes, f)
+        os.replace(self.path + '.tmp', self.path)
@@ -4,34 +4,27 @@ Setup Supabase database tables
 This script creates all the necessary tables in Supabase
 """
 
-import psycopg2
+import argparse
+import sys
 from psycopg2 import sql
+from attendance_partitions import CREATE_PARTITIONED_ATTENDANCE, REFUSE_PLAIN_ATTENDANCE
+from db_connection import create_supabase_connection
+from table_loader import reset_sequence
+from table_specs import TABLE_SPECS
 
-def create_supabase_connection():
-    """Create connection to Supabase database"""
-    try:
-        connection = psycopg2.connect(
-            host='db.sevlfbqydeludjfzatfe.supabase.co',
-            database='postgres',
-            user='postgres',
-            password='puravbhatt0504',
-            port='5432',
-            sslmode='require'
-        )
-        
-        if connection:
-            print("Connected to Supabase database")
-            return connection
-        else:
-            print("Failed to connect to Supabase")
-            return None
-            
-    except Exception as e:
-        print(f"Supabase connection error: {e}")
-        return None
+# Secondary indexes for the portal's access patterns: one employee's rows in a
+# date range, and every employee's rows in a date range
+SECONDARY_INDEXES = [
+    (f"idx_{table}_{'_'.join(columns)}", table, columns)
+    for table in ('attendance', 'travel_expenses', 'general_expenses', 'advances')
+    for columns in (('employee_name', 'date'), ('date',))
+]
+
+# Memory for index builds after a bulk load; only affects this transaction
+INDEX_BUILD_MEMORY = '256MB'
 
-def create_tables(cursor):
-    """Create all necessary tables"""
+def create_tables(cursor, partition_attendance=False):
+    """Create all necessary tables, optionally with attendance partitioned by month"""
     
     # Create employees table
     print("Creating employees table...")
@@ -44,17 +37,21 @@ def create_tables(cursor):
     
     # Create attendance table
     print("Creating attendance table...")
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS attendance (
-            id SERIAL PRIMARY KEY,
-            employee_name VARCHAR(255) NOT NULL,
-            date DATE NOT NULL,
-            shift1_in TIME,
-            shift1_out TIME,
-            shift2_in TIME,
-            shift2_out TIME
-        )
-    """)
+    if partition_attendance:
+        cursor.execute(REFUSE_PLAIN_ATTENDANCE)
+        cursor.execute(CREATE_PARTITIONED_ATTENDANCE)
+    else:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS attendance (
+                id SERIAL PRIMARY KEY,
+                employee_name VARCHAR(255) NOT NULL,
+                date DATE NOT NULL,
+                shift1_in TIME,
+                shift1_out TIME,
+                shift2_in TIME,
+                shift2_out TIME
+            )
+        """)
     
     # Create travel_expenses table
     print("Creating travel_expenses table...")
@@ -97,7 +94,49 @@ def create_tables(cursor):
     
     print("All tables created successfully!")
 
+def create_indexes(cursor):
+    """Create the secondary indexes that do not exist yet"""
+    cursor.execute(sql.SQL("SET LOCAL maintenance_work_mem = {}").format(sql.Literal(INDEX_BUILD_MEMORY)))
+    for name, table, columns in SECONDARY_INDEXES:
+        print(f"Creating index {name}...")
+        cursor.execute(sql.SQL("CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})").format(
+            name=sql.Identifier(name),
+            table=sql.Identifier(table),
+            columns=sql.SQL(', ').join(map(sql.Identifier, columns)),
+        ))
+
+def drop_indexes(cursor):
+    """Drop the secondary indexes so a bulk load does not maintain them row by row"""
+    for name, _, _ in SECONDARY_INDEXES:
+        cursor.execute(sql.SQL("DROP INDEX IF EXISTS {}").format(sql.Identifier(name)))
+    print(f"Dropped {len(SECONDARY_INDEXES)} secondary indexes for the bulk load")
+
+def finish_bulk_load(cursor):
+    """Rebuild the secondary indexes, refresh planner statistics and reset the id sequences"""
+    create_indexes(cursor)
+    for table in TABLE_SPECS:
+        cursor.execute(sql.SQL("ANALYZE {}").format(sql.Identifier(table)))
+        reset_sequence(cursor, table)
+    print("Indexes rebuilt, tables analyzed and id sequences reset")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Create the Supabase tables and their indexes")
+    parser.add_argument('--bulk', action='store_true',
+                        help="create the tables without secondary indexes (dropping existing ones) "
+                             "ahead of a bulk load")
+    parser.add_argument('--partition-attendance', action='store_true',
+                        help="create attendance range-partitioned by date, one partition per month "
+                             "(created by the importer as needed); the key becomes (id, date), and "
+                             "the importer deletes a loaded id's copy under another date before upserting it")
+    parser.add_argument('--finish-bulk', action='store_true',
+                        help="after a bulk load: build the secondary indexes, ANALYZE and reset the id sequences")
+    args = parser.parse_args()
+    if args.bulk and args.finish_bulk:
+        parser.error("--bulk and --finish-bulk are separate steps")
+    return args
+
 def main():
+    args = parse_args()
     print("Setting up Supabase database tables")
     print("=" * 50)
     
@@ -108,10 +147,18 @@ def main():
         return
     
     cursor = connection.cursor()
+    failed = False
     
     try:
-        # Create all tables
-        create_tables(cursor)
+        if args.finish_bulk:
+            finish_bulk_load(cursor)
+        else:
+            # Create all tables
+            create_tables(cursor, args.partition_attendance)
+            if args.bulk:
+                drop_indexes(cursor)
+            else:
+                create_indexes(cursor)
         
         # Commit changes
         connection.commit()
@@ -121,11 +168,14 @@ def main():
     except Exception as e:
         print(f"Setup error: {e}")
         connection.rollback()
+        failed = True
     finally:
         if connection:
             cursor.close()
             connection.close()
             print("Database connection closed")
+    if failed:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Per-table load plans for the import scripts
+Compiles each table spec once into its row converter and its row, batch
+and COPY upsert statements, so the load paths do no per-row SQL building
+"""
+
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+from batch_loader import (DEFAULT_BATCH_SIZE, batch_upsert, build_row_upsert, build_values_delete_moved,
+                          build_values_upsert)
+from copy_loader import CopyStatements, copy_upsert
+from table_specs import TABLE_SPECS
+from value_converters import ConversionPlan
+
+
+class TableLoader:
+    """Converter and upsert statements for one table, compiled from its spec
+
+    When the upserts target a wider key than the spec's own (attendance
+    partitioned on id and date), a row whose extra key columns changed
+    would be inserted next to its old copy; every mode deletes that copy
+    first, and later rows win per spec key.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.plan = ConversionPlan.for_spec(spec)
+        self.row_upsert = build_row_upsert(spec.name, spec.columns, spec.conflict)
+        self.values_upsert = build_values_upsert(spec.name, spec.columns, spec.conflict)
+        self.copy_statements = CopyStatements(spec.name, spec.columns, spec.conflict, spec.key)
+        self.key_positions = tuple(spec.columns.index(column) for column in spec.key)
+        self.values_delete_moved = None
+        if spec.key != spec.conflict:
+            self.values_delete_moved = build_values_delete_moved(spec.name, spec.key, spec.conflict)
+            self.moved_positions = tuple(spec.columns.index(column)
+                                         for column in dict.fromkeys(spec.key + spec.conflict))
+
+    def convert(self, record):
+        """Exported record -> row tuple in spec column order"""
+        return self.plan.convert(record)
+
+    def copy(self, cursor, rows, before_merge=None):
+        """COPY and merge rows; returns (rows_copied, rows_merged)"""
+        return copy_upsert(cursor, self.copy_statements, rows, before_merge)
+
+    def batch(self, cursor, rows, batch_size=DEFAULT_BATCH_SIZE, on_reject=None):
+        """Multi-row upserts with savepoints; returns the number of rows loaded"""
+        before_batch = self.delete_moved if self.values_delete_moved else None
+        return batch_upsert(cursor, self.values_upsert, rows, batch_size,
+                            self.key_positions, on_reject, before_batch)
+
+    def delete_moved(self, cursor, rows):
+        """Delete the stored rows that rows move to another upsert key (a no-op unless keys differ)"""
+        if self.values_delete_moved:
+            execute_values(cursor, self.values_delete_moved,
+                           [tuple(row[i] for i in self.moved_positions) for row in rows], page_size=len(rows))
+
+
+def convert_records(loader, data, rejects):
+    """Yield row tuples, quarantining records that cannot be converted"""
+    convert = loader.convert
+    for record in data:
+        try:
+            yield convert(record)
+        except (KeyError, TypeError, ValueError) as e:
+            rejects.add(record, repr(e))
+
+
+def reset_sequence(cursor, table, column='id'):
+    """Move a SERIAL column's sequence past the ids loaded explicitly
+
+    A DO block returns no result set, so psql prints nothing for it when it
+    runs from a load script.
+    """
+    cursor.execute(sql.SQL("""
+        DO $$
+        BEGIN
+            PERFORM setval(pg_get_serial_sequence({name}, {column_name}), COALESCE(MAX({column}), 0) + 1, false)
+            FROM {table};
+        END
+        $$
+    """).format(table=sql.Identifier(table), column=sql.Identifier(column),
+                name=sql.Literal(table), column_name=sql.Literal(column)))
+
+
+LOADERS = {name: TableLoader(spec) for name, spec in TABLE_SPECS.items()}
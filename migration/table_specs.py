@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Declarative specs for the migrated tables
+One registry of columns, types and keys that the export and import scripts
+compile their queries, statements and row converters from, once per table
+"""
+
+import copy
+
+
+class TableSpec:
+    """Columns, column types and keys of one migrated table"""
+
+    def __init__(self, name, columns, key=('id',), conflict=None, depends_on=(), not_null=(),
+                 incremental=True, singular=None, label=None, describe='{employee_name} - {date}'):
+        self.name = name
+        self.columns = tuple(column for column, _ in columns)
+        self.types = dict(columns)
+        self.key = tuple(key)
+        # Key columns and the columns declared NOT NULL in the target schema
+        self.not_null = tuple(dict.fromkeys(self.key + tuple(not_null)))
+        self.conflict = tuple(conflict or key)
+        self.depends_on = tuple(depends_on)
+        self.incremental = incremental
+        self.export_file = f"{name}_export.json"
+        self.select_sql = f"SELECT {', '.join(self.columns)} FROM {name}"
+        # Wording used by the progress messages
+        self.singular = singular or name.replace('_', ' ')
+        self.label = label or f"{self.singular} records"
+        self.describe = describe
+
+    def columns_of_type(self, column_type):
+        return tuple(column for column in self.columns if self.types[column] == column_type)
+
+    def with_conflict(self, conflict):
+        """The same table loaded against a different unique key"""
+        spec = copy.copy(self)
+        spec.conflict = tuple(conflict)
+        return spec
+
+
+# In load order: every table is listed after the tables it depends on
+TABLE_SPECS = {spec.name: spec for spec in (
+    TableSpec('employees', [('id', 'int'), ('name', 'text')], not_null=('name',),
+              incremental=False, singular='employee', label='employees',
+              describe='{name} (ID: {id})'),
+    TableSpec('attendance', [('id', 'int'), ('employee_name', 'text'), ('date', 'date'),
+                             ('shift1_in', 'time'), ('shift1_out', 'time'),
+                             ('shift2_in', 'time'), ('shift2_out', 'time')],
+              depends_on=('employees',), not_null=('employee_name', 'date')),
+    TableSpec('travel_expenses', [('id', 'int'), ('employee_name', 'text'), ('date', 'date'),
+                                  ('start_reading', 'float'), ('end_reading', 'float'),
+                                  ('distance', 'float'), ('rate', 'float'), ('amount', 'float')],
+              depends_on=('employees',), not_null=('employee_name', 'date', 'amount'),
+              singular='travel expense'),
+    TableSpec('general_expenses', [('id', 'int'), ('employee_name', 'text'), ('date', 'date'),
+                                   ('description', 'text'), ('amount', 'float')],
+              depends_on=('employees',), not_null=('employee_name', 'date', 'amount'),
+              singular='general expense'),
+    TableSpec('advances', [('id', 'int'), ('employee_name', 'text'), ('date', 'date'),
+                           ('amount', 'float'), ('notes', 'text')],
+              depends_on=('employees',), not_null=('employee_name', 'date', 'amount'),
+              singular='advance'),
+)}
+
+
+# Target tables of the Next.js app schema (admin-portal-nextjs/setup-database.sql),
+# keyed by employee_id instead of employee_name. The app has rows of its own,
+# so imported rows are keyed by the legacy table and id they came from and
+# their ids are left to the sequences
+NEXTJS_SPECS = {spec.name: spec for spec in (
+    TableSpec('employees', [('legacy_source', 'text'), ('legacy_id', 'int'), ('name', 'text')],
+              key=('legacy_source', 'legacy_id'), not_null=('name',),
+              incremental=False, singular='employee', label='employees'),
+    TableSpec('attendance', [('legacy_source', 'text'), ('legacy_id', 'int'), ('employee_id', 'int'),
+                             ('date', 'date'), ('shift1_in', 'time'), ('shift1_out', 'time'),
+                             ('shift2_in', 'time'), ('shift2_out', 'time'), ('total_hours', 'float')],
+              key=('legacy_source', 'legacy_id'), depends_on=('employees',), not_null=('date',)),
+    TableSpec('expenses', [('legacy_source', 'text'), ('legacy_id', 'int'), ('employee_id', 'int'),
+                           ('category', 'text'), ('description', 'text'), ('amount', 'float'),
+                           ('date', 'date'), ('kilometers', 'float'), ('expense_type', 'text'),
+                           ('notes', 'text')],
+              key=('legacy_source', 'legacy_id'), depends_on=('employees',),
+              not_null=('category', 'amount', 'date'), singular='expense'),
+)}
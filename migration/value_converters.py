@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Column-typed value conversion for the import scripts
+Each table gets a conversion plan built once from its spec's column types; date and
+time columns use the fast ISO parsers behind a bounded memo cache, and values
+that fail to parse are counted per column instead of silently becoming NULL.
+A record missing a value its NOT NULL columns need is rejected instead.
+"""
+
+from collections import Counter
+from datetime import date, time
+from functools import lru_cache
+from operator import itemgetter
+
+CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_date(value):
+    """'2025-09-01' (or an ISO timestamp) -> date"""
+    if 'T' in value:
+        value = value[:value.index('T')]
+    return date.fromisoformat(value)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_time(value):
+    """'10:32:00' -> time"""
+    return time.fromisoformat(value)
+
+
+def parse_number(value):
+    """Pass JSON numbers through, parse numeric strings"""
+    if isinstance(value, (int, float)):
+        return value
+    return float(value)
+
+
+PARSERS = {
+    'date': parse_date,
+    'time': parse_time,
+    'float': parse_number,
+}
+
+
+class ConversionPlan:
+    """Converts a table's export records to row tuples in column order"""
+
+    def __init__(self, table, columns, column_types, not_null=()):
+        self.table = table
+        self.columns = tuple(columns)
+        # One C-level lookup of every column; itemgetter returns a bare value for one column
+        getter = itemgetter(*self.columns)
+        self.fetch = getter if len(self.columns) > 1 else lambda record: (getter(record),)
+        self.steps = tuple(
+            (position, column, PARSERS[column_types[column]], column in not_null)
+            for position, column in enumerate(self.columns)
+            if column_types.get(column) in PARSERS
+        )
+        self.required = tuple((position, column) for position, column in enumerate(self.columns)
+                              if column in not_null)
+        self.failures = Counter()
+        self.examples = {}
+
+    @classmethod
+    def for_spec(cls, spec):
+        return cls(spec.name, spec.columns, spec.types, spec.not_null)
+
+    def convert(self, record):
+        """Return the record as a tuple; unparseable values become None and are counted
+
+        Raises ValueError when a NOT NULL column is null or unparseable, so
+        the caller rejects the record rather than failing the whole load.
+        """
+        row = list(self.fetch(record))
+        for position, column, parse, required in self.steps:
+            value = row[position]
+            if value is not None:
+                try:
+                    row[position] = parse(value)
+                except (TypeError, ValueError):
+                    if required:
+                        raise ValueError(f"unparseable {self.table}.{column} value {value!r}")
+                    self.failures[column] += 1
+                    self.examples.setdefault(column, value)
+                    row[position] = None
+        for position, column in self.required:
+            if row[position] is None:
+                raise ValueError(f"{self.table}.{column} is NOT NULL but the record has no value")
+        return tuple(row)
+
+    def report(self):
+        """Describe each column that had unparseable values"""
+        return [
+            f"{count} unparseable {self.table}.{column} values loaded as NULL "
+            f"(e.g. {self.examples[column]!r})"
+            for column, count in self.failures.items()
+        ]
+
+    def reset(self):
+        """Forget the counted failures, e.g. before a retried load"""
+        self.failures.clear()
+        self.examples.clear()
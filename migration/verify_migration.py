@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Reconcile MySQL, the export files and Supabase with range checksums
+Every row is hashed from a canonical text form that MySQL, PostgreSQL and
+Python all produce alike; the databases sum those hashes per id range on
+the server, so only a count and a sum per range cross the network. Ranges
+whose sums disagree are split again and again, down to the individual
+ids that are missing or differ.
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+from bisect import bisect_left, bisect_right
+from decimal import ROUND_HALF_UP, Decimal
+from itertools import accumulate
+from db_connection import connect_mysql, connect_supabase
+from export_reader import open_export
+from table_specs import TABLE_SPECS
+
+SIDES = ('mysql', 'export', 'supabase')
+DEFAULT_REPORT_FILE = 'verify_report.json'
+
+# Ranges are split into this many buckets per round trip
+DEFAULT_FANOUT = 16
+# Ranges spanning at most this many ids are compared row by row
+DEFAULT_LEAF_SIZE = 256
+# Stop bisecting a table once this many differing ids were found
+DEFAULT_MAX_DIFFERENCES = 100
+
+# Separators of the canonical row text; control characters no column holds
+FIELD_SEPARATOR = '\x1f'
+NULL_MARKER = '\x1e'
+
+# Floats are compared at the precision of the portal's amounts and readings
+FLOAT_PLACES = Decimal('0.01')
+
+# Canonical text of a column, per spec type, in each SQL dialect
+POSTGRES_CANONICAL = {
+    'int': '{}::text',
+    'text': '{}::text',
+    'date': "to_char({}, 'YYYY-MM-DD')",
+    'time': "to_char({}, 'HH24:MI:SS')",
+    'float': 'round({}::numeric, 2)::text',
+}
+MYSQL_CANONICAL = {
+    'int': 'CAST({} AS CHAR)',
+    'text': 'CAST({} AS CHAR)',
+    'date': "DATE_FORMAT({}, '%%Y-%%m-%%d')",
+    'time': "TIME_FORMAT({}, '%%H:%%i:%%s')",
+    'float': 'CAST(CAST(CAST({} AS DECIMAL(30,10)) AS DECIMAL(30,2)) AS CHAR)',
+}
+
+
+def canonical_value(value, column_type):
+    """An exported value as the text the databases' canonical expressions produce"""
+    if value is None:
+        return NULL_MARKER
+    if column_type == 'int':
+        return str(int(value))
+    if column_type == 'float':
+        rounded = Decimal(repr(float(value))).quantize(FLOAT_PLACES, rounding=ROUND_HALF_UP)
+        return str(rounded if rounded else abs(rounded))
+    return str(value)
+
+
+def text_hash(text):
+    """First 60 bits of the MD5 of text, as the databases compute it"""
+    return int(hashlib.md5(text.encode('utf-8')).hexdigest()[:15], 16)
+
+
+def record_hash(spec, record):
+    return text_hash(FIELD_SEPARATOR.join(
+        canonical_value(record.get(column), spec.types[column]) for column in spec.columns))
+
+
+def postgres_hash(spec):
+    fields = ', '.join(
+        "COALESCE({}, chr(30))".format(POSTGRES_CANONICAL[spec.types[column]].format(f'"{column}"'))
+        for column in spec.columns)
+    return f"('x' || substr(md5(concat_ws(chr(31), {fields})), 1, 15))::bit(60)::bigint"
+
+
+def mysql_hash(spec):
+    fields = ', '.join(
+        "COALESCE({}, CHAR(30 USING utf8mb4))".format(MYSQL_CANONICAL[spec.types[column]].format(f'`{column}`'))
+        for column in spec.columns)
+    return (f"CAST(CONV(SUBSTRING(MD5(CONCAT_WS(CHAR(31 USING utf8mb4), {fields})), 1, 15), 16, 10) "
+            f"AS UNSIGNED)")
+
+
+class DatabaseSide:
+    """Range counts and checksums computed by a database"""
+
+    def __init__(self, name, connection, hash_expression, divide):
+        self.name = name
+        self.connection = connection
+        self.hash_expression = hash_expression
+        self.divide = divide
+
+    def _query(self, query, params):
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def bounds(self, table):
+        return self._query(f"SELECT MIN(id), MAX(id) FROM {table}", None)[0]
+
+    def summary(self, table, low, high, width):
+        """{bucket: (rows, hash sum)} for ids low..high in buckets of width ids"""
+        rows = self._query(f"""
+            SELECT (id - %s) {self.divide} %s AS bucket, COUNT(*), SUM(row_hash)
+            FROM (SELECT id, {self.hash_expression(TABLE_SPECS[table])} AS row_hash
+                  FROM {table} WHERE id BETWEEN %s AND %s) hashed
+            GROUP BY bucket
+        """, (low, width, low, high))
+        return {int(bucket): (count, int(total)) for bucket, count, total in rows}
+
+    def row_hashes(self, table, low, high):
+        return dict(self._query(
+            f"SELECT id, {self.hash_expression(TABLE_SPECS[table])} FROM {table} WHERE id BETWEEN %s AND %s",
+            (low, high)))
+
+    def close(self):
+        self.connection.close()
+
+
+class ExportSide:
+    """Range counts and checksums over the export files, hashed once per table
+
+    Ids are kept sorted with prefix sums of their hashes, so any range sum
+    is two binary searches. A repeated id keeps its last record, as the
+    importer does.
+    """
+
+    name = 'export'
+
+    def __init__(self):
+        self._tables = {}
+
+    def _load(self, table):
+        if table not in self._tables:
+            spec = TABLE_SPECS[table]
+            hashes = {record['id']: record_hash(spec, record)
+                      for record in open_export(spec.export_file)}
+            ids = sorted(hashes)
+            self._tables[table] = (ids, [0] + list(accumulate(hashes[i] for i in ids)), hashes)
+        return self._tables[table]
+
+    def bounds(self, table):
+        ids = self._load(table)[0]
+        return (ids[0], ids[-1]) if ids else (None, None)
+
+    def summary(self, table, low, high, width):
+        ids, sums, _ = self._load(table)
+        buckets = {}
+        for bucket, start in enumerate(range(low, high + 1, width)):
+            first = bisect_left(ids, start)
+            last = bisect_right(ids, min(high, start + width - 1))
+            if last > first:
+                buckets[bucket] = (last - first, sums[last] - sums[first])
+        return buckets
+
+    def row_hashes(self, table, low, high):
+        ids, _, hashes = self._load(table)
+        return {i: hashes[i] for i in ids[bisect_left(ids, low):bisect_right(ids, high)]}
+
+    def close(self):
+        pass
+
+
+def compare_rows(table, sides, low, high):
+    """The ids in low..high that some side lacks or holds differently"""
+    hashes = [side.row_hashes(table, low, high) for side in sides]
+    differences = []
+    for row_id in sorted(set().union(*hashes)):
+        missing = [side.name for side, rows in zip(sides, hashes) if row_id not in rows]
+        present = {side.name: rows[row_id] for side, rows in zip(sides, hashes) if row_id in rows}
+        if missing or len(set(present.values())) > 1:
+            differences.append({'id': row_id, 'missing': missing,
+                                'differs': len(set(present.values())) > 1})
+    return differences
+
+
+def reconcile(table, sides, fanout=DEFAULT_FANOUT, leaf_size=DEFAULT_LEAF_SIZE,
+              max_differences=DEFAULT_MAX_DIFFERENCES):
+    """Compare one table on every side; returns its report entry"""
+    bounds = [side.bounds(table) for side in sides]
+    lows = [low for low, _ in bounds if low is not None]
+    entry = {'rows': {side.name: 0 for side in sides}, 'differences': [], 'truncated': False,
+             'range_queries': 0}
+    if not lows:
+        return entry
+    low, high = min(lows), max(high for _, high in bounds if high is not None)
+
+    totals = [side.summary(table, low, high, high - low + 1).get(0, (0, 0)) for side in sides]
+    entry['rows'] = {side.name: count for side, (count, _) in zip(sides, totals)}
+    pending = [(low, high)] if len(set(totals)) > 1 else []
+    while pending:
+        if len(entry['differences']) >= max_differences:
+            entry['truncated'] = True
+            break
+        low, high = pending.pop()
+        if high - low < leaf_size:
+            entry['differences'].extend(compare_rows(table, sides, low, high))
+            continue
+        width = -(-(high - low + 1) // fanout)
+        summaries = [side.summary(table, low, high, width) for side in sides]
+        entry['range_queries'] += len(sides)
+        mismatched = [bucket for bucket in sorted(set().union(*summaries), reverse=True)
+                      if len({summary.get(bucket) for summary in summaries}) > 1]
+        pending.extend((low + bucket * width, min(high, low + (bucket + 1) * width - 1))
+                       for bucket in mismatched)
+    del entry['differences'][max_differences:]
+    return entry
+
+
+def open_sides(names):
+    sides = []
+    for name in names:
+        if name == 'mysql':
+            sides.append(DatabaseSide('mysql', connect_mysql(), mysql_hash, 'DIV'))
+        elif name == 'supabase':
+            sides.append(DatabaseSide('supabase', connect_supabase(), postgres_hash, '/'))
+        else:
+            sides.append(ExportSide())
+    return sides
+
+
+def describe(difference):
+    if difference['missing']:
+        return f"id {difference['id']}: missing in {', '.join(difference['missing'])}"
+    return f"id {difference['id']}: content differs"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Check that every row reached the exports and Supabase intact")
+    parser.add_argument('--sides', nargs='+', choices=SIDES, default=list(SIDES),
+                        help="what to compare (default: all three)")
+    parser.add_argument('--tables', nargs='+', choices=list(TABLE_SPECS), default=list(TABLE_SPECS))
+    parser.add_argument('--fanout', type=int, default=DEFAULT_FANOUT,
+                        help="buckets a mismatched range is split into per query")
+    parser.add_argument('--leaf-size', type=int, default=DEFAULT_LEAF_SIZE,
+                        help="ranges of at most this many ids are compared row by row")
+    parser.add_argument('--max-differences', type=int, default=DEFAULT_MAX_DIFFERENCES,
+                        help="differing ids to find per table before giving up on it")
+    parser.add_argument('--report', default=DEFAULT_REPORT_FILE, help="where to write the JSON report")
+    args = parser.parse_args()
+    if len(set(args.sides)) < 2:
+        parser.error("--sides needs at least two of mysql, export, supabase")
+    return args
+
+
+def main():
+    args = parse_args()
+    print("Verifying the migration with range checksums")
+    print("=" * 60)
+
+    sides = []
+    report = {}
+    try:
+        sides = open_sides(dict.fromkeys(args.sides))
+        for table in args.tables:
+            entry = report[table] = reconcile(table, sides, args.fanout, args.leaf_size, args.max_differences)
+            counts = ', '.join(f"{side} {count}" for side, count in entry['rows'].items())
+            if not entry['differences'] and len(set(entry['rows'].values())) == 1:
+                print(f"✅ {table}: {counts}; checksums match")
+                continue
+            print(f"❌ {table}: {counts}; differing ids: {len(entry['differences'])}"
+                  + (" (stopped early)" if entry['truncated'] else ""))
+            for difference in entry['differences'][:10]:
+                print(f"   {describe(difference)}")
+    except Exception as e:
+        print(f"❌ Verify error: {e}")
+        sys.exit(2)
+    finally:
+        for side in sides:
+            side.close()
+
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"📋 Report saved to {args.report}")
+    if any(entry['differences'] or len(set(entry['rows'].values())) > 1 for entry in report.values()):
+        sys.exit(1)
+    print("\n🎉 Every compared table matches!")
+
+
+if __name__ == "__main__":
+    main()